@@ -0,0 +1,62 @@
+"""对时与开抢调度：用设置了已知时钟偏差的模拟服务器检查偏差估计
+
+    python -m unittest discover tests
+"""
+import unittest
+
+import requests
+
+from vfmc.clock import ClockOffset, ClockSample, ClockSync
+from vfmc.mock_server import MockServerConfig, MockVfmcServer
+from vfmc.scheduler import ReleaseScheduler
+
+
+class CombineTest(unittest.TestCase):
+    def test_interval_contains_true_offset(self):
+        # 服务器比本地快 0.437 秒，Date 头截断到整秒
+        skew = 0.437
+        samples = []
+        for send in (100.10, 101.70, 102.55, 103.58):
+            recv = send + 0.004
+            server = int(send + 0.002 + skew)
+            samples.append(ClockSample(send=send, recv=recv, server=server))
+        estimate = ClockSync.combine(samples)
+        self.assertLessEqual(abs(estimate.offset - skew), estimate.error)
+
+    def test_no_samples(self):
+        self.assertIsNone(ClockSync.combine([]))
+
+
+class EstimateTest(unittest.TestCase):
+    def check_skew(self, skew: float):
+        with MockVfmcServer(MockServerConfig(clock_skew=skew)) as server, requests.Session() as session:
+            estimate = ClockSync(session, url=f'{server.base_url}/Field/GetVenueStateNew', samples=5).estimate()
+        self.assertIsNotNone(estimate)
+        self.assertEqual(estimate.samples, 5)
+        self.assertLessEqual(abs(estimate.offset - skew), estimate.error + 1e-3)
+        # 逐次对准整秒边界后误差应远小于 Date 头的 1 秒精度
+        self.assertLess(estimate.error, 0.1)
+
+    def test_positive_skew(self):
+        self.check_skew(0.437)
+
+    def test_negative_skew(self):
+        self.check_skew(-1.3)
+
+
+class ApplyOffsetTest(unittest.TestCase):
+    def test_targets_lower_bound(self):
+        # 取偏差区间的下界：真实偏差在区间内任何位置时都不会早于服务器的开抢时刻唤醒
+        scheduler = ReleaseScheduler()
+        scheduler.apply_offset(ClockOffset(offset=0.451, error=0.0166, rtt=0.002, samples=6))
+        self.assertAlmostEqual(scheduler.clock_offset, 0.451 - 0.0166)
+        self.assertAlmostEqual(scheduler.lead_seconds, 0.001)
+
+    def test_none_keeps_local_time(self):
+        scheduler = ReleaseScheduler()
+        scheduler.apply_offset(None)
+        self.assertEqual(scheduler.clock_offset, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+"""跨任务场地协调：认领被释放后，之前没有选出场地的任务必须重新选择
+
+    python -m unittest discover tests
+"""
+import unittest
+
+from vfmc.config import BookingConfig
+from vfmc.coordination import SlotCoordinator
+from vfmc.policy import SelectionPolicy
+from vfmc.slots import SlotIndex
+
+ROWS = [{"FieldNo": "YMQ001", "FieldTypeNo": "017", "FieldName": "羽毛球1号场", "BeginTime": "16:00",
+         "EndTime": "17:00", "FinalPrice": "20.00", "TimePeriod": 1}]
+
+
+class VersionTest(unittest.TestCase):
+    def setUp(self):
+        self.config = BookingConfig.create_default({})
+        self.policy = SelectionPolicy.from_preferred_time("16:00", fallback=False)
+        self.index = SlotIndex.from_rows(ROWS)
+        self.coordinator = SlotCoordinator()
+
+    def test_failed_order_releases_claim(self):
+        # j1 认领唯一的场地，j2 选不出场地；j1 下单失败后 version 变化，j2 再次选择时得到该场地
+        self.assertTrue(self.coordinator.claim("j1", self.config, self.policy, self.index))
+        version = self.coordinator.version
+        self.assertFalse(self.coordinator.claim("j2", self.config, self.policy, self.index))
+        self.coordinator.settle("j1", self.config)
+        self.assertNotEqual(self.coordinator.version, version)
+        self.assertTrue(self.coordinator.claim("j2", self.config, self.policy, self.index))
+
+    def test_release_without_claims_keeps_version(self):
+        version = self.coordinator.version
+        self.coordinator.release("j1")
+        self.coordinator.settle("j1", self.config)
+        self.assertEqual(self.coordinator.version, version)
+
+    def test_booked_slot_stays_excluded(self):
+        self.coordinator.claim("j1", self.config, self.policy, self.index)
+        self.coordinator.settle("j1", self.config, ROWS)
+        self.assertFalse(self.coordinator.claim("j2", self.config, self.policy, self.index))
+
+
+if __name__ == '__main__':
+    unittest.main()
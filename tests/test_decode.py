@@ -0,0 +1,88 @@
+"""场馆状态解码：单次扫描（_scan）与常规的两次解析结果一致
+
+    python -m unittest discover tests
+"""
+import json
+import random
+import unittest
+
+from vfmc import decode
+from vfmc.mock_server import BOOKED, FREE, build_inventory
+
+BACKENDS = {"json": json.loads}
+if decode.orjson is not None:
+    BACKENDS["orjson"] = decode.orjson.loads
+
+# 紧凑写法与 json.dumps 默认的带空格写法，以及非 ASCII 字符是否转义
+STYLES = {
+    "compact": {"separators": (',', ':'), "ensure_ascii": False},
+    "spaced": {"separators": (', ', ': '), "ensure_ascii": False},
+    "ascii": {"separators": (',', ':'), "ensure_ascii": True},
+}
+
+
+def venue_rows(fields: int, free_ratio: float, seed: int = 0):
+    rng = random.Random(seed)
+    return [dict(row, FieldState=FREE if rng.random() < free_ratio else BOOKED)
+            for row in build_inventory(fields=fields)]
+
+
+def response(resultdata, errorcode=0, message="", style="compact", resultdata_last=True) -> bytes:
+    dumps = STYLES[style]
+    if isinstance(resultdata, list):
+        resultdata = json.dumps(resultdata, **dumps)
+    items = [("errorcode", errorcode), ("message", message)]
+    items.insert(len(items) if resultdata_last else 1, ("resultdata", resultdata))
+    return json.dumps(dict(items), **dumps).encode('utf-8')
+
+
+class ScanTest(unittest.TestCase):
+    def assertSameState(self, actual: decode.VenueState, expected: decode.VenueState):
+        self.assertEqual(actual.errorcode, expected.errorcode)
+        self.assertEqual(actual.message, expected.message)
+        self.assertEqual(actual.rows, expected.rows)
+        self.assertEqual([slot.key for slot in actual.free], [slot.key for slot in expected.free])
+        self.assertEqual(actual.catalogue(), expected.catalogue())
+
+    def check(self, body: bytes, scan: bool = True):
+        for name, loads in BACKENDS.items():
+            with self.subTest(backend=name):
+                expected = decode.decode_two_pass(body, loads)
+                if scan:
+                    # 直接调用 _scan，确认没有因为异常退回到常规解码
+                    self.assertSameState(decode._scan(body, loads), expected)
+                self.assertSameState(decode.decode_venue_state(body, loads), expected)
+
+    def test_free_ratios(self):
+        for free_ratio in (0.0, 0.05, 0.3, 0.7, 1.0):
+            for style in STYLES:
+                for resultdata_last in (True, False):
+                    with self.subTest(free_ratio=free_ratio, style=style, resultdata_last=resultdata_last):
+                        self.check(response(venue_rows(12, free_ratio), style=style,
+                                            resultdata_last=resultdata_last))
+
+    def test_large_venue(self):
+        self.check(response(venue_rows(500, 0.1)))
+
+    def test_empty_resultdata(self):
+        for resultdata in ("", "[]"):
+            for style in STYLES:
+                with self.subTest(resultdata=resultdata, style=style):
+                    self.check(response(resultdata, style=style))
+
+    def test_null_resultdata(self):
+        for resultdata_last in (True, False):
+            with self.subTest(resultdata_last=resultdata_last):
+                self.check(response(None, resultdata_last=resultdata_last), scan=False)
+
+    def test_error_envelope(self):
+        for resultdata in (None, ""):
+            with self.subTest(resultdata=resultdata):
+                body = response(resultdata, errorcode=-1, message="未登录")
+                self.check(body, scan=resultdata is not None)
+                state = decode.decode_venue_state(body)
+                self.assertEqual((state.errorcode, state.message, state.rows), (-1, "未登录", 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""预编译的下单表单与原先 json.dumps + quote 逐字段拼接的结果逐字节相同
+
+    python -m unittest discover tests
+"""
+import json
+import unittest
+from urllib.parse import quote
+
+from vfmc.config import BookingConfig
+from vfmc.mock_server import build_inventory
+from vfmc.payload import OrderPayloadCompiler
+from vfmc.slots import Slot
+
+
+def baseline_payload(config: BookingConfig, fields) -> bytes:
+    """原先 book_field 中构造表单的写法，推广到多个场地
+    """
+    checkdata = [{
+        "FieldNo": field["FieldNo"],
+        "FieldTypeNo": field["FieldTypeNo"],
+        "FieldName": field["FieldName"],
+        "BeginTime": field["BeginTime"],
+        "Endtime": field["EndTime"],
+        "Price": field["FinalPrice"],
+        "DateAdd": config.dateadd
+    } for field in fields]
+    query_params = {
+        "checkdata": json.dumps(checkdata, ensure_ascii=False),
+        "VenueNo": config.VenueNo,
+        "OrderType": "Field"
+    }
+    return "&".join([f"{quote(key)}={quote(value)}" for key, value in query_params.items()]).encode('ascii')
+
+
+class PayloadTest(unittest.TestCase):
+    def setUp(self):
+        self.config = BookingConfig.create_default({'UserId': 'u', 'JWTUserToken': 't'})
+        self.inventory = [row for row in build_inventory(fields=3) if row["TimePeriod"] == 1]
+
+    def check(self, compiler: OrderPayloadCompiler, fields):
+        self.assertEqual(compiler.payload(fields), baseline_payload(self.config, fields))
+
+    def test_single_slot(self):
+        for field in self.inventory[:3]:
+            with self.subTest(field=field["FieldNo"]):
+                self.check(OrderPayloadCompiler(self.config), [field])
+
+    def test_several_slots(self):
+        fields = [row for row in self.inventory if row["FieldNo"] == "YMQ002"][:3]
+        self.assertEqual(len(fields), 3)
+        self.check(OrderPayloadCompiler(self.config), fields)
+
+    def test_precompiled_and_slot_objects(self):
+        compiler = OrderPayloadCompiler(self.config)
+        compiler.precompile(self.inventory)
+        fields = self.inventory[:2]
+        self.check(compiler, fields)
+        self.check(compiler, [Slot.from_row(field) for field in fields])
+
+    def test_special_characters(self):
+        field = dict(self.inventory[0], FieldName='羽毛球 1号场 (A&B)', FinalPrice='20.50')
+        self.check(OrderPayloadCompiler(self.config), [field])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""共享限流器：令牌不足时各任务轮流得到令牌，请求更频繁的任务不会挤占其他任务
+
+    python -m unittest discover tests
+"""
+import asyncio
+import threading
+import time
+import unittest
+
+from vfmc.ratelimit import RateLimit, RateLimitConfig, RateLimiter
+
+RATE = 20.0
+DURATION = 1.5
+
+
+def limiter() -> RateLimiter:
+    return RateLimiter(RateLimitConfig(state=RateLimit(rate=RATE, burst=1)))
+
+
+class FairnessTest(unittest.TestCase):
+    def test_threads_share_tokens(self):
+        # greedy 得到令牌后立即再次请求，poller 每次得到令牌后先等 1.25 个令牌间隔
+        rate_limiter = limiter()
+        counts = {"greedy": 0, "poller": 0}
+        stop = time.perf_counter() + DURATION
+
+        def worker(job: str, pause: float):
+            while time.perf_counter() < stop:
+                rate_limiter.acquire('state', job)
+                counts[job] += 1
+                time.sleep(pause)
+
+        threads = [threading.Thread(target=worker, args=("greedy", 0.0)),
+                   threading.Thread(target=worker, args=("poller", 1.25 / RATE))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertLessEqual(sum(counts.values()), RATE * DURATION + 3)
+        self.assertGreaterEqual(counts["poller"], counts["greedy"] - 2)
+
+    def test_coroutines_share_tokens(self):
+        rate_limiter = limiter()
+        counts = {"greedy": 0, "poller": 0}
+
+        async def worker(job: str, pause: float, stop: float):
+            while time.perf_counter() < stop:
+                await rate_limiter.acquire_async('state', job)
+                counts[job] += 1
+                await asyncio.sleep(pause)
+
+        async def main():
+            stop = time.perf_counter() + DURATION
+            await asyncio.gather(worker("greedy", 0.0, stop), worker("poller", 1.25 / RATE, stop))
+
+        asyncio.run(main())
+        self.assertLessEqual(sum(counts.values()), RATE * DURATION + 3)
+        self.assertGreaterEqual(counts["poller"], counts["greedy"] - 2)
+
+    def test_single_job_gets_full_rate(self):
+        rate_limiter = limiter()
+        started = time.perf_counter()
+        for _ in range(11):
+            rate_limiter.acquire('state', "only")
+        self.assertAlmostEqual(time.perf_counter() - started, 10 / RATE, delta=0.1)
+
+    def test_cancelled_wait_leaves_queue(self):
+        rate_limiter = limiter()
+
+        async def main():
+            await rate_limiter.acquire_async('state', "a")
+            task = asyncio.ensure_future(rate_limiter.acquire_async('state', "b"))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        self.assertEqual(rate_limiter.waiting['state'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""天津大学场馆预订脚本的公共组件
+
+导出的名称在第一次访问时才导入对应模块，import vfmc 不会加载 requests 等依赖，也没有副作用。
+"""
+import importlib
+
+_EXPORTS = {
+    'BookingConfig': 'config',
+    'BaseBookingSystem': 'client',
+    'OrderResult': 'client',
+    'VenueBookingSystem': 'client',
+    'Preference': 'policy',
+    'SelectionPolicy': 'policy',
+    'BookingJob': 'jobs',
+    'JobFile': 'jobs',
+    'load_job_file': 'jobs',
+    'ClockSample': 'clock',
+    'ClockOffset': 'clock',
+    'ClockSync': 'clock',
+    'ScheduleConfig': 'scheduler',
+    'ReleaseScheduler': 'scheduler',
+    'PollConfig': 'polling',
+    'PollScheduler': 'polling',
+    'RetryPolicy': 'retry',
+    'SlotDiff': 'snapshot',
+    'VenueSnapshot': 'snapshot',
+    'CancellationConfig': 'jobs',
+    'RequestCeiling': 'cancellations',
+    'RateLimit': 'ratelimit',
+    'RateLimitConfig': 'ratelimit',
+    'RateLimiter': 'ratelimit',
+    'SlotCoordinator': 'coordination',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
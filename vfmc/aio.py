@@ -0,0 +1,293 @@
+import json
+import time
+import asyncio
+import socket
+import logging
+import traceback
+from urllib.parse import urlsplit
+from typing import List, Dict, Optional, Sequence
+
+try:
+    import aiohttp
+except ImportError:  # 异步模式为可选功能，未安装 aiohttp 时仍可使用线程模式
+    aiohttp = None
+
+from .attempts import FETCH, SLEEP, booking_steps
+from .catalogue import CatalogueStore
+from .clock import ClockSync
+from .client import BaseBookingSystem, OrderResult, BASE_URL
+from .config import BookingConfig
+from .coordination import SlotCoordinator
+from .decode import loads
+from .events import EventLog
+from .jobs import BookingJob
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .trace import Tracer
+from .scheduler import ScheduleConfig, ReleaseScheduler
+from .slots import SlotIndex
+
+logger = logging.getLogger(__name__)
+
+
+def create_session(limit: int = 16) -> 'aiohttp.ClientSession':
+    """创建所有预订任务共享的连接池会话
+
+    会话本身不保存 Cookie，由每个任务在请求头中携带自己的 Cookie，避免不同账号之间串号。
+    """
+    if aiohttp is None:
+        raise RuntimeError("异步模式需要安装 aiohttp：pip install aiohttp")
+    connector = aiohttp.TCPConnector(limit=limit, keepalive_timeout=60, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar())
+
+
+class AsyncVenueBookingSystem(BaseBookingSystem):
+    """VenueBookingSystem 的异步版本，多个实例共享同一个 aiohttp 会话
+    """
+
+    def __init__(self, config: BookingConfig, session: 'aiohttp.ClientSession', timeout: float = 10,
+                 base_url: str = BASE_URL, tracer: Optional[Tracer] = None, job_id: Optional[str] = None,
+                 events: Optional[EventLog] = None, limiter: Optional[RateLimiter] = None,
+                 coordinator: Optional[SlotCoordinator] = None):
+        super().__init__(config, base_url, tracer, job_id, events, limiter, coordinator)
+        self.session = session
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.headers['Cookie'] = '; '.join(f'{key}={value}' for key, value in config.cookies.items())
+        self.order_headers = dict(self.headers, **self.order_headers)
+
+    async def warm_up(self, check_cookie: bool = True) -> Dict[str, float]:
+        """预热连接：解析DNS、建立TCP连接并用一次轻量请求校验Cookie，返回各步骤耗时（毫秒）
+        """
+        func_name = "warm_up"
+        timings = {}
+        try:
+            start = time.perf_counter()
+            address = urlsplit(self.base_url)
+            await asyncio.get_running_loop().getaddrinfo(address.hostname, address.port or 80,
+                                                         proto=socket.IPPROTO_TCP)
+            timings['dns'] = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            async with self.session.head(f'{self.base_url}/', headers=self.headers, timeout=self.timeout):
+                pass
+            timings['connect'] = (time.perf_counter() - start) * 1000
+
+            if check_cookie:
+                start = time.perf_counter()
+                async with self.session.get(self._venue_state_url(), headers=self.headers,
+                                            timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    response_json = await response.json(content_type=None)
+                timings['cookie'] = (time.perf_counter() - start) * 1000
+                if response_json.get("errorcode") != 0:
+                    logger.warning(
+                        f"[{func_name}] Cookie校验失败，可能已失效：错误代码 {response_json.get('errorcode')}, 错误信息：{response_json.get('message')}")
+                else:
+                    start = time.perf_counter()
+                    self._precompile_catalogue(response_json)
+                    timings['precompile'] = (time.perf_counter() - start) * 1000
+
+            detail = ", ".join(f"{step} {cost:.1f} 毫秒" for step, cost in timings.items())
+            logger.info(f"[{func_name}] 连接预热完成：{detail}")
+
+        except (OSError, ValueError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"[{func_name}] 连接预热失败: {str(e)}")
+
+        return timings
+
+    def _timeout(self, timeout: Optional[float]) -> 'aiohttp.ClientTimeout':
+        return self.timeout if timeout is None else aiohttp.ClientTimeout(total=timeout)
+
+    async def get_available_fields(self, timeout: Optional[float] = None) -> SlotIndex:
+        """获取可用场地列表，参数与错误处理与同步版本一致
+        """
+        func_name = "get_available_fields"
+        status = None
+        if self.limiter is not None:
+            self._waited('fetch_wait', await self.limiter.acquire_async('state', self.job_id))
+        started = time.perf_counter()
+        try:
+            self._mark('fetch_send')
+            async with self.session.get(self._venue_state_url(), headers=self.headers,
+                                        timeout=self._timeout(timeout)) as response:
+                self._mark('fetch_first_byte')
+                status = response.status
+                response.raise_for_status()
+                body = await response.read()
+            self._mark('fetch_body')
+
+            state, diff = self.snapshot.update(body)
+            self._mark('fetch_decode')
+
+            if state.errorcode == 0:
+                self.last_reply = (status, 0, state.message)
+                available_fields = self._available_slots(state, diff)
+                self._event("fetch", started, status=status, errorcode=0, message=state.message,
+                            rows=self.rows, free=len(available_fields), freed=len(diff.freed), taken=len(diff.taken))
+
+                logger.info(f"[{func_name}] 成功获取场馆状态，找到 {len(available_fields)} 个可预订场地")
+                return available_fields
+            else:
+                self.last_reply = (status, state.errorcode, state.message)
+                self._event("fetch", started, status=status, errorcode=state.errorcode, message=state.message)
+                error_msg = f"获取场馆状态失败：错误代码 {state.errorcode}, 错误信息：{state.message}"
+                logger.error(f"[{func_name}] {error_msg}")
+                return SlotIndex()
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.last_reply = (status, None, str(e) or type(e).__name__)
+            self._event("fetch", started, status=status, error=str(e) or type(e).__name__)
+            logger.error(f"[{func_name}] 网络请求错误: {str(e)}")
+            return SlotIndex()
+
+        except json.JSONDecodeError as e:
+            self.last_reply = (status, None, f"JSON解析错误: {e}")
+            self._event("fetch", started, status=status, error=f"JSON解析错误: {e}")
+            logger.error(f"[{func_name}] JSON解析错误: {str(e)}")
+            return SlotIndex()
+
+        except Exception as e:
+            self.last_reply = (status, None, str(e))
+            self._event("fetch", started, status=status, error=str(e))
+            logger.error(f"[{func_name}] 未预期的错误: {str(e)}\n{traceback.format_exc()}")
+            return SlotIndex()
+
+    async def book_field(self, selected_field: Dict) -> bool:
+        """预订场地
+        """
+        return bool(await self.book_fields([selected_field] if selected_field else []))
+
+    async def book_fields(self, selected_fields: Sequence[Dict], timeout: Optional[float] = None) -> OrderResult:
+        """在一次下单请求中预订一个或多个场地时段，返回每个时段是否成功，timeout 与 get_available_fields 相同
+        """
+        func_name = "book_fields"
+        status = None
+        if self.limiter is not None and selected_fields:
+            self._waited('order_wait', await self.limiter.acquire_async('order', self.job_id))
+        started = time.perf_counter()
+        try:
+            if not selected_fields:
+                logger.warning(f"[{func_name}] 未选择场地，无法进行预订")
+                return OrderResult(())
+
+            payload = self._order_payload(selected_fields)
+
+            self._mark('order_send')
+            async with self.session.post(self.order_url, headers=self.order_headers,
+                                         data=payload, timeout=self._timeout(timeout)) as response:
+                self._mark('order_first_byte')
+                status = response.status
+                response.raise_for_status()
+                body = await response.read()
+            self._mark('order_body')
+
+            response_json = loads(body)
+            self._mark('order_decode')
+            logger.debug(f"[{func_name}] 预订接口返回: {response_json}")
+            return self._order_result(selected_fields, response_json, started, status)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.last_reply = (status, None, str(e) or type(e).__name__)
+            self._event("order", started, status=status, slots=len(selected_fields), booked=0,
+                        failed=len(selected_fields), error=str(e) or type(e).__name__)
+            logger.error(f"[{func_name}] 预订请求发送失败: {str(e)}")
+            return OrderResult(selected_fields)
+
+        except Exception as e:
+            self.last_reply = (status, None, str(e))
+            self._event("order", started, status=status, slots=len(selected_fields), booked=0,
+                        failed=len(selected_fields), error=str(e))
+            logger.error(f"[{func_name}] 预订过程中发生错误: {str(e)}\n{traceback.format_exc()}")
+            return OrderResult(selected_fields)
+
+
+async def book_field_task(booking_system: AsyncVenueBookingSystem, job: BookingJob,
+                          release: Optional[float] = None) -> bool:
+    """单个预订任务，与线程模式的 book_field_thread 签名相同、流程相同（见 attempts.booking_steps）
+    """
+    steps = booking_steps(booking_system, job, RetryPolicy(job.timing, release), "book_field_task")
+    try:
+        step = next(steps)
+        while True:
+            try:
+                if step[0] == SLEEP:
+                    await asyncio.sleep(step[1])
+                    reply = None
+                elif step[0] == FETCH:
+                    reply = await booking_system.get_available_fields(timeout=step[1])
+                else:
+                    reply = await booking_system.book_fields(step[1], timeout=step[2])
+            except Exception as e:
+                step = steps.throw(e)
+            else:
+                step = steps.send(reply)
+    except StopIteration as done:
+        return done.value
+
+
+async def _sleep_until(scheduler: ReleaseScheduler, seconds_before: float):
+    """在事件循环中休眠，直到距离目标时间只剩 seconds_before 秒
+    """
+    func_name = "wait_until_target_time"
+    target_time = scheduler.next_target()
+    while target_time is not None:
+        remaining = (target_time - scheduler.now()).total_seconds()
+        if remaining <= seconds_before:
+            return
+        logger.info(f"[{func_name}] 等待中... 距离开始时间还有 {remaining:.0f} 秒")
+        await asyncio.sleep(min(remaining - seconds_before, 60))
+
+
+async def wait_until_target_time(booking_systems: List[AsyncVenueBookingSystem],
+                                 schedule: Optional[ScheduleConfig] = None):
+    """等待直到服务器时间到达目标时间，对时与连接预热在事件循环中完成
+    """
+    scheduler = ReleaseScheduler(schedule or ScheduleConfig())
+    if scheduler.next_target() is not None:
+        await _sleep_until(scheduler, scheduler.config.sync_seconds)
+        clock_sync = ClockSync(url=booking_systems[0].state_endpoint) if booking_systems else ClockSync()
+        scheduler.apply_offset(await asyncio.get_running_loop().run_in_executor(None, clock_sync.estimate))
+
+        await _sleep_until(scheduler, scheduler.config.warm_up_seconds)
+        await asyncio.gather(*(booking_system.warm_up() for booking_system in booking_systems))
+
+    # 最后一段直接在事件循环线程中精确等待：此时没有其他任务需要运行，
+    # 返回后所有预订任务在同一个循环里立即开始，不经过线程切换
+    scheduler.wait()
+
+
+async def run_jobs(jobs: Sequence[BookingJob], schedule: Optional[ScheduleConfig] = None, base_url: str = BASE_URL,
+                   tracer: Optional[Tracer] = None, catalogue_store: Optional[CatalogueStore] = None,
+                   events: Optional[EventLog] = None, limiter: Optional[RateLimiter] = None,
+                   coordinator: Optional[SlotCoordinator] = None) -> int:
+    """在一个事件循环中运行全部预订任务，返回成功数量
+
+    未传入 schedule 时立即开始，否则先等待到开抢时间。传入 catalogue_store 时开抢前读取已保存的场地目录，
+    结束后保存本次看到的场地目录。传入 limiter 时全部任务的查询与下单请求共用这个限流器；
+    传入 coordinator 时各任务通过它分配场地，不会对同一个时段重复下单。
+    """
+    async with create_session() as session:
+        booking_systems = [
+            AsyncVenueBookingSystem(job.config, session, base_url=base_url, tracer=tracer, job_id=job.name,
+                                    events=events, limiter=limiter, coordinator=coordinator)
+            for job in jobs
+        ]
+        if catalogue_store is not None:
+            for booking_system in booking_systems:
+                booking_system.learn_catalogue(catalogue_store.load(booking_system.config))
+
+        if schedule is not None:
+            await wait_until_target_time(booking_systems, schedule)
+        release = time.perf_counter()
+
+        results = await asyncio.gather(*(
+            book_field_task(booking_system, job, release)
+            for booking_system, job in zip(booking_systems, jobs)
+        ))
+
+        if catalogue_store is not None:
+            # 只保存本次从接口看到的目录；只读取了缓存（推测下单成功或全部查询失败）时不刷新 last_seen
+            for booking_system in booking_systems:
+                if booking_system.observed:
+                    catalogue_store.save(booking_system.config, booking_system.catalogue)
+        return sum(results)
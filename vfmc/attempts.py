@@ -0,0 +1,132 @@
+"""线程与协程两种运行方式共用的单个预订任务流程
+
+booking_steps 是一个生成器，只做决策：何时等待、何时查询、选择哪些场地、何时下单、何时停止。
+它依次产出需要执行的操作，调用方用自己的方式执行后把结果送回：
+
+    (SLEEP, 秒数)              送回 None
+    (FETCH, 超时)              送回 get_available_fields 的返回值
+    (ORDER, 场地时段, 超时)     送回 book_fields 的返回值
+
+生成器的返回值表示是否预订成功。runner.book_field_thread 与 aio.book_field_task 只负责执行这些操作，
+重试、选择与停止的规则只在这里写一次。
+"""
+import logging
+import traceback
+from typing import Generator, Tuple
+
+from .jobs import BookingJob
+from .policy import missing_slots, replacement_policy
+from .retry import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+SLEEP = 'sleep'
+FETCH = 'fetch'
+ORDER = 'order'
+
+Steps = Generator[Tuple, object, bool]
+
+
+def booking_steps(booking_system, job: BookingJob, retry: RetryPolicy, func_name: str) -> Steps:
+    """单个预订任务：查询、选择、下单，失败后按 retry 重试
+
+    job.speculative 为 True 且已知场地目录时，先不查询直接对排名第一的场地下单，被拒绝后再走正常流程。
+    选出的多个连续时段在同一个下单请求中提交，全部时段都预订成功才算完成；部分成功时保留已预订的时段，
+    之后只为缺少的时段重新选择场地（见 policy.replacement_policy）。
+    重试间隔、截止时间、单次请求超时与终止错误由 retry 决定；func_name 用于日志。
+    """
+    policy = job.policy
+    missing = None  # 部分预订成功后仍然缺少的时段
+    try:
+        # 推测下单：用已知的场地目录直接对首选场地下单，省掉开抢后第一次查询的往返，被拒绝后再走正常流程
+        if job.speculative:
+            selected_fields = booking_system.speculative_slots(policy)
+            if selected_fields and retry.take():
+                booking_system.begin_attempt(0)
+                result = yield ORDER, selected_fields, retry.timeout()
+                booking_system.end_attempt(result.outcome)
+                if result.booked:
+                    missing = missing_slots(result.slots, result.booked)
+                    if not missing:
+                        logger.info(f"[{func_name}] 推测下单成功！")
+                        return True
+                    policy = replacement_policy(missing)
+                if not retry.check(booking_system.last_reply):
+                    if missing:
+                        logger.warning(f"[{func_name}] 推测下单部分成功，为其余 {len(missing)} 个时段重新选择场地")
+                    else:
+                        logger.warning(f"[{func_name}] 推测下单未成功，转为查询后下单")
+
+        nothing_selected = False
+        for attempt in range(1, retry.max_attempts + 1):
+            if attempt > 1:
+                delay = retry.next_delay()
+                if delay is None:
+                    break
+                logger.info(f"[{func_name}] 等待{delay:.2f}秒后重试")
+                yield SLEEP, delay
+            if not retry.take():
+                break
+            logger.info(f"[{func_name}] 第 {attempt} 次尝试预订")
+            booking_system.begin_attempt(attempt)
+
+            # 获取可用场地
+            available_fields = yield FETCH, retry.timeout()
+
+            if not available_fields:
+                booking_system.end_attempt("no_fields")
+                if retry.check(booking_system.last_reply):
+                    break
+                logger.warning(f"[{func_name}] 未找到可用场地")
+                continue
+
+            # 选择场地：上一次没有选出场地、这次既没有新空出的场地也没有其他任务释放认领时结果不会变化，不必重新选择
+            if nothing_selected and booking_system.selection_unchanged():
+                booking_system.end_attempt("unchanged")
+                logger.warning(f"[{func_name}] 没有新空出的场地")
+                continue
+            selected_fields = booking_system.select_slots(available_fields, policy)
+            nothing_selected = not selected_fields
+
+            if not selected_fields:
+                booking_system.end_attempt("select_failed")
+                logger.warning(f"[{func_name}] 场地选择失败")
+                continue
+
+            # 预订场地
+            if not retry.take():
+                booking_system.end_attempt(retry.reason)
+                break
+            result = yield ORDER, selected_fields, retry.timeout()
+            booking_system.end_attempt(result.outcome)
+
+            if result.booked:
+                missing = missing_slots(result.slots if missing is None else missing, result.booked)
+                if not missing:
+                    logger.info(f"[{func_name}] 预订成功！")
+                    return True
+                policy = replacement_policy(missing)
+                nothing_selected = False
+            if retry.check(booking_system.last_reply):
+                break
+            if missing:
+                logger.warning(f"[{func_name}] 还有 {len(missing)} 个时段未预订成功，重新选择场地")
+            else:
+                logger.warning(f"[{func_name}] 预订失败")
+        else:
+            retry.stop("max_attempts")
+
+        if missing:
+            logger.error(f"[{func_name}] {retry.describe()}，停止预订，只预订成功部分时段，"
+                         f"缺少 {', '.join(slot['BeginTime'] for slot in missing)} 开始的时段")
+        else:
+            logger.error(f"[{func_name}] {retry.describe()}，停止预订")
+
+    except Exception as e:
+        logger.error(f"[{func_name}] 任务执行过程中发生错误: {str(e)}\n{traceback.format_exc()}")
+
+    finally:
+        if booking_system.coordinator is not None:
+            booking_system.coordinator.release(booking_system.job_id)
+
+    return False
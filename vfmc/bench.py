@@ -0,0 +1,258 @@
+"""开抢流程的性能基准：在本地模拟服务器上反复执行 等待 → 查询 → 选择 → 下单
+
+每个任务走与正式运行相同的路径（runner.book_field_thread / aio.book_field_task，即 attempts.booking_steps 与
+get_available_fields / book_fields），各阶段耗时取自 tracer 收到的 AttemptTrace 记录。
+按阶段统计开抢时刻之后的耗时分布（毫秒），并比较线程/协程、新建连接/连接池几种运行方式，
+结果以 JSON 输出，便于在不同版本之间对比。
+
+    python -m vfmc.bench --runs 20 --output bench.json
+"""
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import threading
+from typing import List, Dict, Optional, Sequence
+from datetime import datetime, timedelta
+
+from .config import BookingConfig
+from .client import VenueBookingSystem
+from .jobs import BookingJob, TimingBudget
+from .logs import init_logging
+from .policy import SelectionPolicy
+from .runner import book_field_thread
+from .stats import summarize
+from .scheduler import ScheduleConfig, ReleaseScheduler
+from .mock_server import MockServerConfig, MockVfmcServer
+
+logger = logging.getLogger(__name__)
+
+MODES = ['threaded-pooled', 'threaded-fresh', 'async-pooled', 'async-fresh']
+PHASES = ['wake', 'start', 'fetch', 'parse', 'select', 'order', 'total']
+PREFERRED_TIMES = ["16:00", "17:00", "18:00", "19:00"]
+TIMING = TimingBudget(max_attempts=3, deadline=10.0)  # 模拟服务器在开抢时刻开放，正常情况下第一次尝试就能完成
+
+
+def _next_release(lead: float) -> datetime:
+    """下一个距离现在至少 lead 秒的整秒时刻，作为本轮的开抢时间
+    """
+    return (datetime.now() + timedelta(seconds=lead + 1)).replace(microsecond=0)
+
+
+def _schedule_for(release: datetime) -> ScheduleConfig:
+    return ScheduleConfig(hour=release.hour, minute=release.minute, second=release.second,
+                          roll_over=False, warm_up_seconds=0.5, lock_seconds=0.2)
+
+
+def _jobs(configs: List[BookingConfig]) -> List[BookingJob]:
+    # 推测下单依赖缓存的场地目录，基准只测量查询后下单的流程
+    return [BookingJob(name=f"bench{index}", config=config,
+                       policy=SelectionPolicy.from_preferred_time(PREFERRED_TIMES[index % len(PREFERRED_TIMES)]),
+                       timing=TIMING, speculative=False)
+            for index, config in enumerate(configs)]
+
+
+def _between(marks: Dict[str, float], first: str, last: str) -> Optional[float]:
+    if first in marks and last in marks:
+        return marks[last] - marks[first]
+    return None
+
+
+def _job_record(traces: List[Dict], success: bool, release_ts: float, wake: float) -> Dict:
+    """把一个任务各次尝试的 AttemptTrace 记录换算成相对开抢时刻的阶段耗时（毫秒）
+
+    fetch 与 parse 取第一次查询，select 取最后一次选出场地的尝试，order 取最后一次下单；没有对应阶段时为 None。
+    """
+    traces = sorted(traces, key=lambda trace: trace["attempt"])
+    record = {"wake": wake, "success": success, "fetches": len(traces),
+              "fetch": None, "parse": None, "select": None, "order": None}
+    if not traces:
+        record["start"] = record["total"] = None
+        return record
+    for trace in traces:
+        marks = trace["marks"]
+        if record["fetch"] is None:
+            record["fetch"] = _between(marks, 'fetch_send', 'fetch_body')
+            record["parse"] = _between(marks, 'fetch_body', 'filter')
+        record["select"] = _between(marks, 'filter', 'select') if 'select' in marks else record["select"]
+        record["order"] = _between(marks, 'order_send', 'order_decode') if 'order_decode' in marks else record["order"]
+    record["start"] = (traces[0]["wall_time"] - release_ts) * 1000
+    record["total"] = (traces[-1]["wall_time"] - release_ts) * 1000 + traces[-1]["elapsed"]
+    return record
+
+
+def _records(jobs: List[BookingJob], traces: List[Dict], results: Sequence[bool], release_ts: float,
+             wake: float) -> List[Dict]:
+    return [_job_record([trace for trace in traces if trace["job"] == job.name], success, release_ts, wake)
+            for job, success in zip(jobs, results)]
+
+
+def run_threaded(server: MockVfmcServer, configs: List[BookingConfig], pooled: bool) -> List[Dict]:
+    """线程模式：每个任务一个线程，与 runner.run_jobs 的运行方式一致
+    """
+    jobs = _jobs(configs)
+    traces = []
+    booking_systems = [VenueBookingSystem(job.config, base_url=server.base_url, tracer=traces.append,
+                                          job_id=job.name)
+                       for job in jobs]
+    if not pooled:
+        for booking_system in booking_systems:
+            booking_system.session.headers['Connection'] = 'close'
+
+    release = _next_release(1)
+    release_ts = release.timestamp()
+    server.reset(release_at=release_ts)
+
+    def warm_up():
+        for booking_system in booking_systems:
+            booking_system.warm_up(check_cookie=False)
+
+    ReleaseScheduler(_schedule_for(release)).wait(on_warm_up=warm_up if pooled else None)
+    started = time.perf_counter()
+    wake = (time.time() - release_ts) * 1000
+
+    results = [False] * len(jobs)
+
+    def worker(index: int):
+        results[index] = book_field_thread(booking_systems[index], jobs[index], started)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(len(jobs))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for booking_system in booking_systems:
+        booking_system.close()
+    return _records(jobs, traces, results, release_ts, wake)
+
+
+async def _run_async(server: MockVfmcServer, configs: List[BookingConfig], pooled: bool) -> List[Dict]:
+    import aiohttp
+    from .aio import AsyncVenueBookingSystem, book_field_task
+
+    jobs = _jobs(configs)
+    traces = []
+    connector = aiohttp.TCPConnector(force_close=not pooled)
+    async with aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar()) as session:
+        booking_systems = [AsyncVenueBookingSystem(job.config, session, base_url=server.base_url,
+                                                   tracer=traces.append, job_id=job.name)
+                           for job in jobs]
+
+        release = _next_release(1)
+        release_ts = release.timestamp()
+        server.reset(release_at=release_ts)
+        scheduler = ReleaseScheduler(_schedule_for(release))
+
+        if pooled:
+            await asyncio.sleep(max((release - datetime.now()).total_seconds() - 0.5, 0))
+            await asyncio.gather(*(booking_system.warm_up(check_cookie=False) for booking_system in booking_systems))
+        scheduler.wait()
+        started = time.perf_counter()
+        wake = (time.time() - release_ts) * 1000
+
+        results = await asyncio.gather(*(
+            book_field_task(booking_system, job, started) for booking_system, job in zip(booking_systems, jobs)
+        ))
+
+    return _records(jobs, traces, results, release_ts, wake)
+
+
+def run_async(server: MockVfmcServer, configs: List[BookingConfig], pooled: bool) -> List[Dict]:
+    """协程模式：全部任务在同一个事件循环中运行
+    """
+    return asyncio.run(_run_async(server, configs, pooled))
+
+
+def run_benchmark(modes: Sequence[str], runs: int = 20, jobs: int = 2,
+                  server_config: Optional[MockServerConfig] = None) -> Dict:
+    """对每种运行方式执行 runs 轮开抢，返回各阶段的统计结果
+    """
+    configs = [
+        BookingConfig.create_default({'UserId': f'bench{index}', 'JWTUserToken': 'bench'}, 1 if index % 2 == 0 else 2)
+        for index in range(jobs)
+    ]
+    server_config = server_config or MockServerConfig()
+    result = {
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": runs,
+        "jobs": jobs,
+        "server": {"latency": server_config.latency, "jitter": server_config.jitter, "fields": server_config.fields},
+        "modes": {},
+    }
+
+    with MockVfmcServer(server_config) as server:
+        for mode in modes:
+            backend, connection = mode.split('-')
+            runner = run_threaded if backend == 'threaded' else run_async
+            records = []
+            for run in range(runs):
+                records.extend(runner(server, configs, connection == 'pooled'))
+                logger.info(f"[run_benchmark] {mode} 第 {run + 1}/{runs} 轮完成")
+
+            result["modes"][mode] = {
+                "success_rate": sum(1 for record in records if record["success"]) / len(records),
+                "fetches": summarize([record["fetches"] for record in records]),
+                "phases": {phase: summarize([record[phase] for record in records if record[phase] is not None])
+                           for phase in PHASES},
+            }
+
+    return result
+
+
+def format_summary(result: Dict) -> str:
+    """把结果整理成便于阅读的表格（p50/p90/p99，毫秒）
+    """
+    lines = [f"{'mode':<16}" + "".join(f"{phase:>22}" for phase in PHASES)]
+    for mode, stats in result["modes"].items():
+        cells = []
+        for phase in PHASES:
+            summary = stats["phases"][phase]
+            if not summary["n"]:
+                cells.append("-".rjust(22))
+                continue
+            cells.append(f"{summary['p50']:.2f}/{summary['p90']:.2f}/{summary['p99']:.2f}".rjust(22))
+        lines.append(f"{mode:<16}" + "".join(cells))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='开抢流程性能基准（本地模拟服务器）')
+    parser.add_argument('--runs', type=int, default=20, help='每种运行方式的开抢轮数')
+    parser.add_argument('--jobs', type=int, default=2, help='同时运行的预订任务数')
+    parser.add_argument('--modes', default=','.join(MODES), help=f'逗号分隔，可选 {",".join(MODES)}')
+    parser.add_argument('--latency', type=float, default=0.005, help='模拟服务器的固定延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='模拟服务器的随机延迟上限（秒）')
+    parser.add_argument('--fields', type=int, default=12, help='每个时段的场地数量')
+    parser.add_argument('--output', default=None, help='JSON 结果文件，默认输出到标准输出')
+    args = parser.parse_args()
+
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"未知的运行方式: {', '.join(unknown)}")
+
+    # 标准输出只放 JSON 结果，日志写到标准错误
+    init_logging(level=logging.WARNING, stream=sys.stderr)
+    logger.setLevel(logging.INFO)
+
+    result = run_benchmark(modes, runs=args.runs, jobs=args.jobs,
+                           server_config=MockServerConfig(latency=args.latency, jitter=args.jitter,
+                                                          fields=args.fields))
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+    print(format_summary(result), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
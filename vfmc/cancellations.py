@@ -0,0 +1,192 @@
+"""退订监视模式：开抢结束后长时间低频查询，有人退订、匹配的场地重新出现时立即下单
+
+每个任务一个线程，持续数小时到数天。每个任务的请求（查询与下单合计）在任意 60 秒内不超过
+requests_per_minute 个；两次查询之间间隔 poll_interval 秒，查询间隔应留出下单所需的名额，
+例如默认每 30 秒查询一次、每分钟最多 4 个请求，有场地空出时可以立即下单。
+
+只保存上一次查询的结果（VenueSnapshot）并与之比较，只有出现新空出的时段或上一次下单失败时才重新选择场地，
+长时间运行时内存占用不随查询次数增长。监视的日期在启动时确定，跨过零点后自动调整 dateadd，日期过去后结束。
+
+    python -m vfmc cancellations jobs.toml --hours 48 --rpm 4
+"""
+import time
+import logging
+import threading
+import traceback
+from collections import deque
+from dataclasses import replace
+from datetime import date, timedelta
+from typing import Callable, Optional, Sequence
+
+from .client import VenueBookingSystem, BASE_URL
+from .coordination import SlotCoordinator
+from .events import EventLog
+from .jobs import BookingJob, CancellationConfig
+from .policy import missing_slots, replacement_policy
+from .ratelimit import RateLimiter
+from .retry import STOP_REASONS, classify_reply
+from .trace import Tracer
+
+logger = logging.getLogger(__name__)
+
+WATCH_STOP_REASONS = {
+    **STOP_REASONS,
+    "expired": "达到监视时长",
+    "date_passed": "监视的日期已经过去",
+    "stopped": "监视被中止",
+}
+
+
+class RequestCeiling:
+    """每分钟请求数的硬上限：任意 window 秒内发出的请求不超过 per_minute 个
+
+    只记录最近 per_minute 个请求的时刻，已满时等到最早的一个移出窗口，长时间运行时内存不会增长。
+    """
+
+    def __init__(self, per_minute: int, window: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.clock = clock
+        self.sent = deque(maxlen=per_minute)
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """还要等待多少秒才能发出下一个请求
+        """
+        if len(self.sent) < self.sent.maxlen:
+            return 0.0
+        now = self.clock() if now is None else now
+        return max(self.sent[0] + self.window - now, 0.0)
+
+    def acquire(self, stop: threading.Event) -> bool:
+        """等到可以发出下一个请求并记录下来，等待期间 stop 被设置时返回 False
+        """
+        while not stop.is_set():
+            delay = self.delay()
+            if delay <= 0:
+                self.sent.append(self.clock())
+                return True
+            stop.wait(delay)
+        return False
+
+
+def watch_job(job: BookingJob, config: Optional[CancellationConfig] = None, stop: Optional[threading.Event] = None,
+              base_url: str = BASE_URL, tracer: Optional[Tracer] = None, events: Optional[EventLog] = None,
+              limiter: Optional[RateLimiter] = None, coordinator: Optional[SlotCoordinator] = None) -> bool:
+    """监视单个任务的场地，新空出的时段中有符合选择策略的场地时立即下单，返回是否预订成功
+
+    只在出现新空出的时段（第一次查询时为全部可预订的时段）、其他任务释放了认领或上一次下单失败时才重新选择场地；
+    未登录、账号已有预订等终止错误出现后立即结束。多个时段只有部分预订成功时继续监视，只为缺少的时段选择场地。
+    """
+    func_name = "watch_job"
+    config = config or CancellationConfig()
+    stop = stop or threading.Event()
+    ceiling = RequestCeiling(config.requests_per_minute)
+    target = date.today() + timedelta(days=job.config.dateadd)
+    expires = time.monotonic() + config.hours * 3600
+    booking_system = None
+    reason = None
+    reselect = False
+    policy = job.policy
+    missing = None  # 部分预订成功后仍然缺少的时段
+    polls = 0
+    logger.info(f"[{func_name}] 开始监视 {target} 的退订，最长 {config.hours:g} 小时，"
+                f"每 {config.poll_interval:g} 秒查询一次，每分钟最多 {config.requests_per_minute} 个请求")
+    try:
+        while reason is None:
+            if time.monotonic() >= expires:
+                reason = "expired"
+                break
+            dateadd = (target - date.today()).days
+            if dateadd < 0:
+                reason = "date_passed"
+                break
+            if booking_system is None or booking_system.config.dateadd != dateadd:
+                # 下单表单中带有 dateadd，跨过零点后用新的 dateadd 重新创建
+                if booking_system is not None:
+                    booking_system.close()
+                booking_system = VenueBookingSystem(replace(job.config, dateadd=dateadd), base_url=base_url,
+                                                    tracer=tracer, job_id=job.name, events=events,
+                                                    timeout=config.request_timeout, limiter=limiter,
+                                                    coordinator=coordinator)
+            if not ceiling.acquire(stop):
+                reason = "stopped"
+                break
+
+            polls += 1
+            booking_system.begin_attempt(polls)
+            available_fields = booking_system.get_available_fields()
+
+            if not available_fields:
+                booking_system.end_attempt("no_fields")
+                reason = classify_reply(*booking_system.last_reply)
+            elif not reselect and booking_system.selection_unchanged():
+                booking_system.end_attempt("unchanged")
+            else:
+                selected_fields = booking_system.select_slots(available_fields, policy)
+                reselect = False
+                if not selected_fields:
+                    booking_system.end_attempt("select_failed")
+                elif not ceiling.acquire(stop):
+                    booking_system.end_attempt("stopped")
+                    reason = "stopped"
+                else:
+                    result = booking_system.book_fields(selected_fields)
+                    booking_system.end_attempt(result.outcome)
+                    if result.booked:
+                        missing = missing_slots(result.slots if missing is None else missing, result.booked)
+                        if not missing:
+                            logger.info(f"[{func_name}] 监视到退订并预订成功！")
+                            return True
+                        policy = replacement_policy(missing)
+                        logger.warning(f"[{func_name}] 部分时段预订成功，继续监视其余 {len(missing)} 个时段")
+                    reason = classify_reply(*booking_system.last_reply)
+                    # 下单被拒绝（场地被别人抢先）或网络错误时，其余符合条件的场地可能仍然空着，
+                    # 下一次查询即使没有新空出的时段也重新选择
+                    reselect = reason is None
+
+            if reason is None and stop.wait(config.poll_interval):
+                reason = "stopped"
+
+        logger.warning(f"[{func_name}] {WATCH_STOP_REASONS.get(reason, reason)}，共查询 {polls} 次，停止监视"
+                       + (f"，缺少 {', '.join(slot['BeginTime'] for slot in missing)} 开始的时段" if missing else ""))
+
+    except Exception as e:
+        logger.error(f"[{func_name}] 监视过程中发生错误: {str(e)}\n{traceback.format_exc()}")
+
+    finally:
+        if coordinator is not None:
+            coordinator.release(job.name)
+        if booking_system is not None:
+            booking_system.close()
+
+    return False
+
+
+def run_jobs(jobs: Sequence[BookingJob], config: Optional[CancellationConfig] = None, base_url: str = BASE_URL,
+             tracer: Optional[Tracer] = None, events: Optional[EventLog] = None,
+             stop: Optional[threading.Event] = None, limiter: Optional[RateLimiter] = None,
+             coordinator: Optional[SlotCoordinator] = None) -> int:
+    """每个任务一个线程监视退订，返回预订成功的数量；按下 Ctrl+C 时通知全部线程结束
+
+    传入 limiter 时全部任务共用这个限流器，每个任务自己的每分钟请求数上限仍然有效；传入 coordinator 时各任务通过它分配场地。
+    """
+    stop = stop or threading.Event()
+    results = [False] * len(jobs)
+
+    def worker(index: int):
+        results[index] = watch_job(jobs[index], config, stop, base_url, tracer, events, limiter, coordinator)
+
+    threads = [threading.Thread(target=worker, args=(index,), name=jobs[index].name, daemon=True)
+               for index in range(len(jobs))]
+    for t in threads:
+        t.start()
+    try:
+        for t in threads:
+            # 带超时地等待，主线程才能及时响应 Ctrl+C
+            while t.is_alive():
+                t.join(1.0)
+    except KeyboardInterrupt:
+        logger.warning("[run_jobs] 收到中断，等待监视线程结束")
+        stop.set()
+        for t in threads:
+            t.join()
+    return sum(results)
@@ -0,0 +1,125 @@
+import time
+import sqlite3
+import logging
+from typing import Dict, List, Optional
+from contextlib import closing
+from datetime import date, timedelta
+
+from .config import BookingConfig
+
+logger = logging.getLogger(__name__)
+
+# 场地目录中保存的字段，FieldState 每次查询都会变化，不保存
+CATALOGUE_KEYS = ("FieldNo", "FieldTypeNo", "FieldName", "BeginTime", "EndTime", "FinalPrice")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalogue (
+    venue_no TEXT NOT NULL,
+    field_type_no TEXT NOT NULL,
+    time_period INTEGER NOT NULL,
+    weekday INTEGER NOT NULL,
+    field_no TEXT NOT NULL,
+    begin_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    field_name TEXT NOT NULL,
+    final_price TEXT NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (venue_no, field_type_no, time_period, weekday, field_no, begin_time)
+)
+"""
+
+
+def target_weekday(config: BookingConfig, today: Optional[date] = None) -> int:
+    """预订日期是星期几（0 表示星期一），周末与工作日的场地和价格可能不同
+    """
+    return ((today or date.today()) + timedelta(days=config.dateadd)).weekday()
+
+
+class CatalogueStore:
+    """场地目录的本地缓存，保存在 SQLite 文件中
+
+    按 VenueNo/FieldTypeNo/TimePeriod/星期几 分组，每个场地时段记录最近一次看到的时间，
+    超过 max_age 未再出现的记录在保存时自动清理。场地编号、名称、时段与价格每天基本不变，
+    开抢前无需联网即可据此预编译下单表单、推测下单，模拟服务器也可以用它作为场地目录。
+    """
+
+    def __init__(self, path: str = 'catalogue.db', max_age: float = 30 * 86400):
+        self.path = path
+        self.max_age = max_age  # 秒
+        with closing(self._connect()) as conn, conn:
+            conn.execute(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每次操作使用独立的短连接，多个线程同时读写也不会共享连接
+        return sqlite3.connect(self.path, timeout=5)
+
+    def load(self, config: BookingConfig, weekday: Optional[int] = None) -> List[Dict]:
+        """读取场地目录；预订日期对应的星期几没有记录时，退而使用其他日期最近一次看到的目录
+        """
+        weekday = target_weekday(config) if weekday is None else weekday
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT field_no, field_type_no, field_name, begin_time, end_time, final_price FROM catalogue "
+                "WHERE venue_no = ? AND field_type_no = ? AND time_period = ? AND weekday = ? "
+                "ORDER BY begin_time, field_no",
+                (config.VenueNo, config.FieldTypeNo, config.TimePeriod, weekday)).fetchall()
+            if not rows:
+                # SQLite 中与 MAX() 同时查询的普通列取自最大值所在的那一行
+                rows = conn.execute(
+                    "SELECT field_no, field_type_no, field_name, begin_time, end_time, final_price, MAX(last_seen) "
+                    "FROM catalogue WHERE venue_no = ? AND field_type_no = ? AND time_period = ? "
+                    "GROUP BY field_no, begin_time ORDER BY begin_time, field_no",
+                    (config.VenueNo, config.FieldTypeNo, config.TimePeriod)).fetchall()
+        return [dict(zip(CATALOGUE_KEYS, row)) for row in rows]
+
+    def last_seen(self, config: BookingConfig, weekday: Optional[int] = None) -> Optional[float]:
+        """该分组最近一次更新的时间戳，没有记录时返回 None
+        """
+        weekday = target_weekday(config) if weekday is None else weekday
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT MAX(last_seen) FROM catalogue "
+                "WHERE venue_no = ? AND field_type_no = ? AND time_period = ? AND weekday = ?",
+                (config.VenueNo, config.FieldTypeNo, config.TimePeriod, weekday)).fetchone()
+        return row[0]
+
+    def save(self, config: BookingConfig, fields: List[Dict], weekday: Optional[int] = None):
+        """保存（合并）场地目录并刷新 last_seen，同时清理过期记录
+        """
+        if not fields:
+            return
+        weekday = target_weekday(config) if weekday is None else weekday
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO catalogue VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(config.VenueNo, config.FieldTypeNo, config.TimePeriod, weekday,
+                  field["FieldNo"], field["BeginTime"], field["EndTime"], field["FieldName"], field["FinalPrice"], now)
+                 for field in fields])
+            self._evict(conn, now)
+
+    def evict(self) -> int:
+        """删除超过 max_age 未再出现的记录，返回删除的条数
+        """
+        with closing(self._connect()) as conn, conn:
+            return self._evict(conn, time.time())
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> int:
+        deleted = conn.execute("DELETE FROM catalogue WHERE last_seen < ?", (now - self.max_age,)).rowcount
+        if deleted:
+            logger.info(f"[evict] 清理了 {deleted} 条过期的场地目录记录")
+        return deleted
+
+    def inventory(self, field_type_no: Optional[str] = None) -> List[Dict]:
+        """导出带 TimePeriod 的场地目录，可直接作为模拟服务器的 inventory
+        """
+        query = ("SELECT field_no, field_type_no, field_name, begin_time, end_time, final_price, time_period, "
+                 "MAX(last_seen) FROM catalogue")
+        params = ()
+        if field_type_no is not None:
+            query += " WHERE field_type_no = ?"
+            params = (field_type_no,)
+        query += " GROUP BY time_period, field_no, begin_time ORDER BY time_period, begin_time, field_no"
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [dict(zip(CATALOGUE_KEYS + ("TimePeriod",), row)) for row in rows]
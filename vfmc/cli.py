@@ -0,0 +1,153 @@
+"""统一的命令行入口，取代原先的 single.py、1hour.py 与 2hours.py
+
+    python -m vfmc once jobs.toml        # 立即查询并下单一次（原 single.py）
+    python -m vfmc watch jobs.toml       # 立即开始，按任务的尝试预算反复尝试（原 1hour.py）
+    python -m vfmc scheduled jobs.toml   # 等到开抢时间再开始（原 2hours.py）
+    python -m vfmc cancellations jobs.toml --hours 48  # 开抢结束后长时间低频查询，有人退订时立即下单
+    python -m vfmc validate jobs.toml --check-login
+    python -m vfmc analyze events.jsonl  # 按日期统计事件日志
+
+运行方式默认取任务文件中的 run.backend，可以用 --backend threaded/async 覆盖。
+本模块只在执行命令时才导入网络相关的模块并初始化日志，import 本身没有副作用。
+"""
+import logging
+import argparse
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODES = ('once', 'watch', 'scheduled', 'cancellations')
+
+
+def run(mode: str, path: str, backend: Optional[str] = None, base_url: Optional[str] = None,
+        roll_over: Optional[bool] = None, events_path: Optional[str] = None, hours: Optional[float] = None,
+        requests_per_minute: Optional[int] = None) -> int:
+    """按指定模式运行任务文件中的全部任务，全部成功时返回 0
+
+    hours 与 requests_per_minute 只用于 cancellations 模式，覆盖任务文件中 [cancellations] 的设置。
+    """
+    from dataclasses import replace
+
+    from .catalogue import CatalogueStore
+    from .coordination import SlotCoordinator
+    from .client import BASE_URL
+    from .events import EventLog
+    from .jobs import JobFileError, load_job_file
+    from .ratelimit import RateLimiter
+    from .trace import log_tracer
+
+    func_name = "run"
+    try:
+        job_file = load_job_file(path)
+    except JobFileError as e:
+        logger.error(f"[{func_name}] 任务文件有误，共 {len(e.errors)} 个问题：\n" + "\n".join(e.errors))
+        return 2
+
+    jobs = job_file.jobs
+    schedule = None
+    if mode == 'once':
+        # 只查询并下单一次，不推测下单
+        jobs = tuple(replace(job, timing=replace(job.timing, max_attempts=1), speculative=False) for job in jobs)
+    elif mode == 'scheduled':
+        schedule = job_file.schedule if roll_over is None else replace(job_file.schedule, roll_over=roll_over)
+
+    backend = backend or job_file.backend
+    if mode == 'cancellations':
+        # 退订监视每个任务每分钟只有几个请求，只提供线程方式
+        backend = 'threaded'
+    tracer = log_tracer if job_file.trace else None
+    catalogue_store = CatalogueStore(job_file.catalogue) if job_file.catalogue else None
+    events_path = events_path or job_file.events
+    events = EventLog(events_path) if events_path else None
+    limiter = RateLimiter(job_file.rate_limit) if job_file.rate_limit.enabled else None
+    coordinator = SlotCoordinator() if job_file.coordinate else None
+    logger.info(f"[{func_name}] 以 {mode} 模式运行 {len(jobs)} 个任务，运行方式 {backend}")
+
+    try:
+        if mode == 'cancellations':
+            from .cancellations import run_jobs
+            config = job_file.cancellations
+            if hours is not None:
+                config = replace(config, hours=hours)
+            if requests_per_minute is not None:
+                config = replace(config, requests_per_minute=requests_per_minute)
+            success = run_jobs(jobs, config, base_url=base_url or BASE_URL, tracer=tracer, events=events,
+                               limiter=limiter, coordinator=coordinator)
+        elif backend == 'async':
+            import asyncio
+
+            from .aio import run_jobs
+            success = asyncio.run(run_jobs(jobs, schedule, base_url=base_url or BASE_URL, tracer=tracer,
+                                           catalogue_store=catalogue_store, events=events, limiter=limiter,
+                                           coordinator=coordinator))
+        else:
+            from .runner import run_jobs
+            success = run_jobs(jobs, schedule, base_url=base_url or BASE_URL, tracer=tracer,
+                               catalogue_store=catalogue_store, events=events, limiter=limiter,
+                               coordinator=coordinator)
+    finally:
+        if events is not None:
+            events.close()
+        if limiter is not None:
+            logger.info(f"[{func_name}] 限流：{limiter.describe()}")
+
+    if success == len(jobs):
+        logger.info(f"[{func_name}] 全部 {len(jobs)} 个任务预订成功！")
+        return 0
+    logger.warning(f"[{func_name}] {len(jobs)} 个任务中有 {len(jobs) - success} 个未能预订成功")
+    return 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m vfmc', description='天津大学场馆预订')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('path', nargs='?', default='jobs.toml', help='任务文件（.toml/.yaml/.yml），默认 jobs.toml')
+    common.add_argument('--backend', choices=('threaded', 'async'), default=None,
+                        help='运行方式，默认取任务文件中的 run.backend')
+    common.add_argument('--base-url', default=None, help='接口根地址，测试时可指向本地模拟服务器')
+    common.add_argument('--log-file', default=None, help='日志文件，默认 booking_<日期>.log')
+    common.add_argument('--no-log-file', action='store_true', help='只输出到标准输出')
+    common.add_argument('--events', default=None, help='结构化事件日志文件，默认取任务文件中的 run.events')
+    common.add_argument('-v', '--verbose', action='store_true', help='输出调试日志')
+
+    subparsers.add_parser('once', parents=[common], help='立即查询并下单一次')
+    subparsers.add_parser('watch', parents=[common], help='立即开始，按尝试预算反复尝试')
+    scheduled = subparsers.add_parser('scheduled', parents=[common], help='等到开抢时间再开始')
+    scheduled.add_argument('--roll-over', dest='roll_over', action='store_true', default=None,
+                           help='已过今天的开抢时间时等到明天')
+    scheduled.add_argument('--no-roll-over', dest='roll_over', action='store_false',
+                           help='已过今天的开抢时间时立即开始')
+    cancellations = subparsers.add_parser('cancellations', parents=[common],
+                                          help='长时间低频查询，有人退订、匹配的场地重新出现时立即下单')
+    cancellations.add_argument('--hours', type=float, default=None, help='监视时长（小时），默认取任务文件中的设置')
+    cancellations.add_argument('--rpm', dest='requests_per_minute', type=int, default=None,
+                               help='每个任务每分钟的请求数上限，默认取任务文件中的设置')
+
+    validate = subparsers.add_parser('validate', help='校验任务文件')
+    validate.add_argument('path', nargs='?', default='jobs.toml', help='任务文件，默认 jobs.toml')
+    validate.add_argument('--check-login', action='store_true', help='联网检查每个任务的 Cookie 是否有效')
+
+    analyze = subparsers.add_parser('analyze', help='按日期统计事件日志中的耗时与结果')
+    analyze.add_argument('paths', nargs='+', help='事件日志文件（JSON Lines）')
+    analyze.add_argument('--json', action='store_true', help='输出 JSON')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.command == 'validate':
+        from .jobs import validate
+        return validate(args.path, args.check_login)
+    if args.command == 'analyze':
+        from .events import main as analyze
+        return analyze([*args.paths, *(['--json'] if args.json else [])])
+
+    from .logs import default_log_file, init_logging
+    init_logging(None if args.no_log_file else args.log_file or default_log_file(),
+                 logging.DEBUG if args.verbose else logging.INFO)
+    return run(args.command, args.path, backend=args.backend, base_url=args.base_url,
+               roll_over=getattr(args, 'roll_over', None), events_path=args.events,
+               hours=getattr(args, 'hours', None), requests_per_minute=getattr(args, 'requests_per_minute', None))
@@ -0,0 +1,475 @@
+import json
+import time
+import random
+import socket
+import logging
+import traceback
+from urllib.parse import urlsplit
+from typing import List, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import BookingConfig
+from .coordination import SlotCoordinator
+from .decode import VenueState, loads
+from .events import EventLog
+from .payload import FORM_CONTENT_TYPE, OrderPayloadCompiler
+from .policy import SelectionPolicy
+from .ratelimit import RateLimiter
+from .slots import Slot, SlotIndex
+from .snapshot import SlotDiff, VenueSnapshot
+from .trace import Tracer, TraceMixin
+
+logger = logging.getLogger(__name__)
+
+HOST = 'vfmc.tju.edu.cn'
+BASE_URL = f'http://{HOST}'
+
+
+class OrderResult:
+    """一次下单请求的结果，记录请求中每个场地时段是否预订成功
+
+    接口返回 errorcode 为 0 且 message 为空时全部成功；message 不为空但 resultdata 列出了部分场地时，
+    这些场地预订成功，其余失败；否则全部失败。作为布尔值使用时表示是否全部成功。
+    """
+    __slots__ = ('slots', 'booked', 'failed', 'errorcode', 'message')
+
+    def __init__(self, slots: Sequence[Dict], booked: Sequence[Dict] = (), errorcode=None, message: str = ''):
+        self.slots = tuple(slots)
+        self.booked = tuple(booked)
+        self.failed = tuple(slot for slot in self.slots if slot not in self.booked)
+        self.errorcode = errorcode
+        self.message = message
+
+    @classmethod
+    def from_response(cls, slots: Sequence[Dict], response_json: Dict) -> 'OrderResult':
+        errorcode = response_json.get("errorcode")
+        message = response_json.get("message")
+        if errorcode == 0 and message == "":
+            return cls(slots, slots, errorcode, message)
+        booked = ()
+        if errorcode == 0 and response_json.get("resultdata"):
+            try:
+                confirmed = {(item.get("FieldNo"), item.get("BeginTime"))
+                             for item in json.loads(response_json["resultdata"])}
+            except (ValueError, TypeError, AttributeError):
+                confirmed = set()
+            booked = [slot for slot in slots if (slot["FieldNo"], slot["BeginTime"]) in confirmed]
+        return cls(slots, booked, errorcode, message)
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.booked) and bool(self.failed)
+
+    @property
+    def outcome(self) -> str:
+        """对应的计时记录 outcome
+        """
+        return "booked" if self else "partial" if self.partial else "order_failed"
+
+    def __bool__(self) -> bool:
+        return bool(self.slots) and not self.failed
+
+    def __repr__(self) -> str:
+        return f"OrderResult(booked={list(self.booked)}, failed={list(self.failed)})"
+
+
+class BaseBookingSystem(TraceMixin):
+    """同步与异步预订系统共用的部分：请求头、接口地址、下单参数、场地选择与计时钩子
+
+    传入 tracer 后，每次尝试（begin_attempt 到 end_attempt 之间）的各阶段时间戳会汇总成一条记录交给 tracer；
+    传入 events 后，每次查询、选择与下单各写一条结构化事件；传入 limiter 后，查询与下单请求发出前先经过共享的限流器；
+    传入 coordinator 后，按选择策略选择场地时跳过其他任务已认领或已预订的时段。
+    """
+
+    def __init__(self, config: BookingConfig, base_url: str = BASE_URL, tracer: Optional[Tracer] = None,
+                 job_id: Optional[str] = None, events: Optional[EventLog] = None,
+                 limiter: Optional[RateLimiter] = None, coordinator: Optional[SlotCoordinator] = None):
+        self.config = config
+        self.base_url = base_url.rstrip('/')  # 接口根地址，测试时可指向本地模拟服务器
+        self.tracer = tracer
+        self.events = events
+        self.limiter = limiter
+        self.coordinator = coordinator
+        self.job_id = job_id or f"{config.VenueNo}-{config.FieldTypeNo}-{config.TimePeriod}"
+        self.headers = {
+            'Accept': '*/*',
+            'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7',
+            'Connection': 'keep-alive',
+            'Referer': f'{self.base_url}/Views/Field/FieldOrder.html?VenueNo={config.VenueNo}&FieldTypeNo={config.FieldTypeNo}&FieldType=Field',
+            'User-Agent': 'Mozilla/5.0 (Linux; Android 12; Lenovo L79031 Build/SKQ1.220119.001; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/126.0.6478.71 Mobile Safari/537.36 XWEB/1260037 MMWEBSDK/20240404 MMWEBID/4282 MicroMessenger/8.0.49.2600(0x2800315A) WeChat/arm64 Weixin NetType/WIFI Language/zh_CN ABI/arm64',
+            'X-Requested-With': 'XMLHttpRequest'
+        }
+        # 下单相关的内容在开抢前准备好，开抢时只做查表和拼接
+        self.order_url = f'{self.base_url}/Field/OrderField'
+        self.order_headers = {'Content-Type': FORM_CONTENT_TYPE}
+        self.payloads = OrderPayloadCompiler(config)
+        self._catalogue = []
+        self._catalogue_state = None  # 最近一次查询的结果，其中的完整场地目录在第一次用到时才解码
+        self.observed = False  # 场地目录是否来自本次运行中场馆状态接口的返回，而不只是读取的缓存
+        self.rows = 0  # 最近一次查询返回的场地总数
+        self.last_reply = None  # 最近一次查询或下单的 (HTTP 状态码, errorcode, message)，用于判断是否还值得重试
+        self.snapshot = VenueSnapshot()  # 上一次查询的结果，用于跳过没有变化的响应并得到可预订时段的变化
+        self.diff = None  # 最近一次查询相对上一次的变化
+        self.claims_version = None  # 最近一次选择场地时协调器的 version
+
+    @property
+    def catalogue(self) -> List[Dict]:
+        """最近一次看到的完整场地目录（包括不可预订的场地），用于推测下单
+        """
+        if self._catalogue_state is not None:
+            catalogue, self._catalogue_state = self._catalogue_state.catalogue(), None
+            if catalogue:
+                self._catalogue = catalogue
+        return self._catalogue
+
+    @catalogue.setter
+    def catalogue(self, fields: List[Dict]):
+        self._catalogue = fields
+        self._catalogue_state = None
+
+    @property
+    def state_endpoint(self) -> str:
+        """查询场馆状态接口的路径（不带参数），也用于对时
+        """
+        return f'{self.base_url}/Field/GetVenueStateNew'
+
+    def _venue_state_url(self) -> str:
+        """查询场馆状态的接口地址，末尾带上时间戳防止缓存
+        """
+        return f'{self.state_endpoint}?dateadd={self.config.dateadd}&TimePeriod={self.config.TimePeriod}&VenueNo={self.config.VenueNo}&FieldTypeNo={self.config.FieldTypeNo}&_={int(time.time() * 1000)}'
+
+    def _order_payload(self, selected_fields: Sequence[Dict]) -> bytes:
+        """构造下单请求的表单内容，checkdata 中依次放入每个场地时段，已预编译的场地直接查表
+        """
+        return self.payloads.payload(selected_fields)
+
+    def _order_result(self, selected_fields: Sequence[Dict], response_json: Dict, started: Optional[float] = None,
+                      status: Optional[int] = None) -> OrderResult:
+        """根据下单接口的返回判断每个场地时段是否预订成功，并记录日志
+        """
+        func_name = "book_fields"
+        result = OrderResult.from_response(selected_fields, response_json)
+        self.last_reply = (status, result.errorcode, result.message)
+        if self.coordinator is not None:
+            self.coordinator.settle(self.job_id, self.config, result.booked)
+        self._event("order", started, status=status, errorcode=result.errorcode, message=result.message,
+                    slots=len(result.slots), booked=len(result.booked), failed=len(result.failed))
+        if result:
+            logger.info(f"[{func_name}] 预订成功！请前往微信网页查看订单详情")
+        elif result.partial:
+            logger.warning(
+                f"[{func_name}] 部分场地预订成功：成功 {list(result.booked)}，失败 {list(result.failed)}，错误信息：{result.message}")
+        else:
+            logger.error(f"[{func_name}] 预订失败：错误代码 {result.errorcode}, 错误信息：{result.message}")
+        return result
+
+    def learn_catalogue(self, fields: List[Dict]) -> int:
+        """记录完整的场地目录并预编译下单表单，返回已预编译的条目数
+        """
+        if fields:
+            self.catalogue = fields
+        return self.payloads.precompile(fields)
+
+    def _precompile_catalogue(self, response_json: Dict) -> int:
+        """用场馆状态接口返回的完整场地目录（不论是否可预订）预编译下单表单
+        """
+        fields = json.loads(response_json.get("resultdata") or "[]")
+        self.observed = self.observed or bool(fields)
+        return self.learn_catalogue(fields)
+
+    def speculative_field(self, preferred_time: Union[str, Sequence[str], SelectionPolicy, None] = None,
+                          shuffle: bool = True) -> Optional[Slot]:
+        """不查询场馆状态，直接从已知的场地目录中按同样的规则选出排名第一的场地
+        """
+        if not self.catalogue:
+            return None
+        return self.select_field(self.catalogue, preferred_time=preferred_time, shuffle=shuffle)
+
+    def speculative_slots(self, preferred_time: Union[str, Sequence[str], SelectionPolicy, None] = None,
+                          shuffle: bool = True) -> Tuple[Slot, ...]:
+        """与 speculative_field 相同，但按 select_slots 的规则可以选出多个连续时段
+        """
+        if not self.catalogue:
+            return ()
+        return self.select_slots(self.catalogue, preferred_time, shuffle=shuffle)
+
+    def _available_slots(self, state: VenueState, diff: Optional[SlotDiff] = None) -> SlotIndex:
+        """为解码得到的可预订（FieldState 为 "0"）场地建立索引，完整的场地目录留到用到时再解码
+
+        传入 diff 时直接使用其中已经建立好的索引，与上一次相同的响应不再重复处理。
+        """
+        self.rows = state.rows
+        self.diff = diff
+        if state.rows:
+            self._catalogue_state = state
+            self.observed = True
+        available_fields = SlotIndex(state.free) if diff is None else diff.free
+        self._mark('filter')
+        if diff is not None and diff.changed and not diff.initial:
+            logger.info(f"[get_available_fields] 场馆状态有变化：新空出 {len(diff.freed)} 个时段，"
+                        f"{len(diff.taken)} 个时段不再可预订")
+        return available_fields
+
+    def selection_unchanged(self) -> bool:
+        """自上一次选择场地以来，选择结果是否不会变化：最近一次查询没有新空出的时段，且其他任务没有释放认领
+        """
+        if self.diff is None or self.diff.freed:
+            return False
+        return self.coordinator is None or self.coordinator.version == self.claims_version
+
+    def select_slots(self, available_fields: Union[SlotIndex, Iterable[Dict]],
+                     policy: Union[str, Sequence[str], SelectionPolicy, None],
+                     shuffle: bool = True) -> Tuple[Slot, ...]:
+        """按选择策略选出场地时段，连续时段的偏好会返回多个时段，没有符合条件的场地时返回空元组
+
+        policy 不是 SelectionPolicy 时按 select_field 的偏好时间规则选出一个场地。
+        """
+        func_name = "select_slots"
+        if not isinstance(policy, SelectionPolicy):
+            selected_field = self.select_field(available_fields, preferred_time=policy, shuffle=shuffle)
+            selected = (selected_field,) if selected_field else ()
+            self._select_event(available_fields, selected)
+            return selected
+        try:
+            if not available_fields:
+                logger.warning(f"[{func_name}] 没有可预订的场地")
+                return ()
+            if not isinstance(available_fields, SlotIndex):
+                available_fields = SlotIndex.from_rows(available_fields)
+
+            if self.coordinator is not None:
+                # 先读取 version 再认领，认领期间其他任务释放的时段也会使下一次判断为有变化
+                self.claims_version = self.coordinator.version
+                selected = self.coordinator.claim(self.job_id, self.config, policy, available_fields)
+            else:
+                selected = policy.select(available_fields)
+            self._mark('select')
+            self._select_event(available_fields, selected)
+            if not selected:
+                logger.warning(f"[{func_name}] 没有符合选择策略的场地")
+                return ()
+            logger.info(
+                f"[{func_name}] 选择场地: {selected[0].field_name}, 时间段为 {selected[0].begin_time} - {selected[-1].end_time}")
+            return selected
+
+        except Exception as e:
+            logger.error(f"[{func_name}] 选择场地时发生错误: {str(e)}\n{traceback.format_exc()}")
+            return ()
+
+    def _select_event(self, available_fields, selected: Optional[Sequence[Slot]]):
+        if self.events is not None:
+            selected = selected or ()
+            self._event("select", candidates=len(available_fields) if available_fields else 0, selected=len(selected),
+                        fields=[slot.field_no for slot in selected],
+                        begin=selected[0].begin_time if selected else None,
+                        end=selected[-1].end_time if selected else None)
+
+    def select_field(self, available_fields: Union[SlotIndex, Iterable[Dict]],
+                     preferred_time: Union[str, Sequence[str], SelectionPolicy, None] = None,
+                     shuffle: bool = True) -> Optional[Slot]:
+        """选择场地，支持按偏好时间选择；preferred_time 可以是按优先级排列的多个时间
+
+        同一偏好有多个场地时随机选择一个，shuffle 为 False 时按接口返回顺序选择第一个；
+        所有偏好都没有匹配时同样在全部场地中选择。preferred_time 也可以是 SelectionPolicy，
+        此时按策略确定地选择，返回选中时段中的第一个。
+        """
+        func_name = "select_field"
+        if isinstance(preferred_time, SelectionPolicy):
+            selected = self.select_slots(available_fields, preferred_time)
+            return selected[0] if selected else None
+        try:
+            if not available_fields:
+                logger.warning(f"[{func_name}] 没有可预订的场地")
+                return None
+            if not isinstance(available_fields, SlotIndex):
+                available_fields = SlotIndex.from_rows(available_fields)
+
+            if preferred_time:
+                # 按优先级依次查索引，找到首选时间的场地
+                preferences = [preferred_time] if isinstance(preferred_time, str) else preferred_time
+                for preference in preferences:
+                    candidates = available_fields.at(preference)
+                    if candidates:
+                        field = random.choice(candidates) if shuffle else candidates[0]
+                        self._mark('select')
+                        logger.info(
+                            f"[{func_name}] 找到符合偏好时间的场地: {field.field_name}, 时间段为 {field.begin_time} - {field.end_time}")
+                        return field
+
+            # 如果没有指定首选时间或未找到匹配场地，返回第一个可用场地
+            selected_field = random.choice(available_fields.slots) if shuffle else available_fields[0]
+            self._mark('select')
+            logger.info(
+                f"[{func_name}] 选择场地: {selected_field.field_name}, 时间段为 {selected_field.begin_time} - {selected_field.end_time}")
+            return selected_field
+
+        except Exception as e:
+            logger.error(f"[{func_name}] 选择场地时发生错误: {str(e)}\n{traceback.format_exc()}")
+            return None
+
+
+class VenueBookingSystem(BaseBookingSystem):
+    def __init__(self, config: BookingConfig, base_url: str = BASE_URL, tracer: Optional[Tracer] = None,
+                 job_id: Optional[str] = None, events: Optional[EventLog] = None, timeout: float = 10,
+                 limiter: Optional[RateLimiter] = None, coordinator: Optional[SlotCoordinator] = None):
+        super().__init__(config, base_url, tracer, job_id, events, limiter, coordinator)
+        self.timeout = timeout  # 未指定单次请求超时时使用的默认值（秒）
+        # 长连接会话：查询与预订两个接口共用同一个连接池，避免每次请求都重新建立TCP连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(self.headers)
+        self.session.cookies.update(config.cookies)
+
+    def warm_up(self, check_cookie: bool = True) -> Dict[str, float]:
+        """预热连接：解析DNS、建立TCP连接并用一次轻量请求校验Cookie，返回各步骤耗时（毫秒）
+        """
+        func_name = "warm_up"
+        timings = {}
+        try:
+            start = time.perf_counter()
+            address = urlsplit(self.base_url)
+            socket.getaddrinfo(address.hostname, address.port or 80, proto=socket.IPPROTO_TCP)
+            timings['dns'] = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            self.session.head(f'{self.base_url}/', timeout=self.timeout)
+            timings['connect'] = (time.perf_counter() - start) * 1000
+
+            if check_cookie:
+                start = time.perf_counter()
+                response = self.session.get(self._venue_state_url(), timeout=self.timeout)
+                response.raise_for_status()
+                response_json = response.json()
+                timings['cookie'] = (time.perf_counter() - start) * 1000
+                if response_json.get("errorcode") != 0:
+                    logger.warning(
+                        f"[{func_name}] Cookie校验失败，可能已失效：错误代码 {response_json.get('errorcode')}, 错误信息：{response_json.get('message')}")
+                else:
+                    start = time.perf_counter()
+                    self._precompile_catalogue(response_json)
+                    timings['precompile'] = (time.perf_counter() - start) * 1000
+
+            detail = ", ".join(f"{step} {cost:.1f} 毫秒" for step, cost in timings.items())
+            logger.info(f"[{func_name}] 连接预热完成：{detail}")
+
+        except (OSError, ValueError) as e:
+            logger.warning(f"[{func_name}] 连接预热失败: {str(e)}")
+
+        return timings
+
+    def close(self):
+        """关闭会话并释放连接池
+        """
+        self.session.close()
+
+    def get_available_fields(self, timeout: Optional[float] = None) -> SlotIndex:
+        """获取可用场地列表，只发送一次请求，失败时返回空列表，是否与何时重试由调用方的 RetryPolicy 决定
+
+        timeout 为本次请求的超时时间（秒），默认使用 self.timeout。
+        """
+        func_name = "get_available_fields"
+        status = None
+        if self.limiter is not None:
+            self._waited('fetch_wait', self.limiter.acquire('state', self.job_id))
+        started = time.perf_counter()
+        try:
+            url = self._venue_state_url()
+            self._mark('fetch_send')
+            with self.session.get(url, timeout=timeout or self.timeout, stream=True) as response:
+                self._mark('fetch_first_byte')
+                status = response.status_code
+                response.raise_for_status()
+                body = response.content
+            self._mark('fetch_body')
+
+            state, diff = self.snapshot.update(body)
+            self._mark('fetch_decode')
+
+            if state.errorcode == 0:
+                self.last_reply = (status, 0, state.message)
+                available_fields = self._available_slots(state, diff)
+                self._event("fetch", started, status=status, errorcode=0, message=state.message,
+                            rows=self.rows, free=len(available_fields), freed=len(diff.freed), taken=len(diff.taken))
+
+                logger.info(f"[{func_name}] 成功获取场馆状态，找到 {len(available_fields)} 个可预订场地")
+                return available_fields
+            else:
+                self.last_reply = (status, state.errorcode, state.message)
+                self._event("fetch", started, status=status, errorcode=state.errorcode, message=state.message)
+                error_msg = f"获取场馆状态失败：错误代码 {state.errorcode}, 错误信息：{state.message}"
+                logger.error(f"[{func_name}] {error_msg}")
+                return SlotIndex()
+
+        except requests.exceptions.RequestException as e:
+            self.last_reply = (status, None, str(e))
+            self._event("fetch", started, status=status, error=str(e))
+            logger.error(f"[{func_name}] 网络请求错误: {str(e)}")
+            return SlotIndex()
+
+        except json.JSONDecodeError as e:
+            self.last_reply = (status, None, f"JSON解析错误: {e}")
+            self._event("fetch", started, status=status, error=f"JSON解析错误: {e}")
+            logger.error(f"[{func_name}] JSON解析错误: {str(e)}")
+            return SlotIndex()
+
+        except Exception as e:
+            self.last_reply = (status, None, str(e))
+            self._event("fetch", started, status=status, error=str(e))
+            logger.error(f"[{func_name}] 未预期的错误: {str(e)}\n{traceback.format_exc()}")
+            return SlotIndex()
+
+    def book_field(self, selected_field: Dict) -> bool:
+        """预订场地
+        """
+        return bool(self.book_fields([selected_field] if selected_field else []))
+
+    def book_fields(self, selected_fields: Sequence[Dict], timeout: Optional[float] = None) -> OrderResult:
+        """在一次下单请求中预订一个或多个场地时段，返回每个时段是否成功，timeout 与 get_available_fields 相同
+        """
+        func_name = "book_fields"
+        status = None
+        if self.limiter is not None and selected_fields:
+            self._waited('order_wait', self.limiter.acquire('order', self.job_id))
+        started = time.perf_counter()
+        try:
+            if not selected_fields:
+                logger.warning(f"[{func_name}] 未选择场地，无法进行预订")
+                return OrderResult(())
+
+            payload = self._order_payload(selected_fields)
+
+            self._mark('order_send')
+            with self.session.post(
+                self.order_url,
+                headers=self.order_headers,
+                data=payload,
+                timeout=timeout or self.timeout,
+                stream=True
+            ) as response:
+                self._mark('order_first_byte')
+                status = response.status_code
+                response.raise_for_status()
+                body = response.content
+            self._mark('order_body')
+
+            response_json = loads(body)
+            self._mark('order_decode')
+            logger.debug(f"[{func_name}] 预订接口返回: {response_json}")
+            return self._order_result(selected_fields, response_json, started, status)
+
+        except requests.exceptions.RequestException as e:
+            self.last_reply = (status, None, str(e))
+            self._event("order", started, status=status, slots=len(selected_fields), booked=0,
+                        failed=len(selected_fields), error=str(e))
+            logger.error(f"[{func_name}] 预订请求发送失败: {str(e)}")
+            return OrderResult(selected_fields)
+
+        except Exception as e:
+            self.last_reply = (status, None, str(e))
+            self._event("order", started, status=status, slots=len(selected_fields), booked=0,
+                        failed=len(selected_fields), error=str(e))
+            logger.error(f"[{func_name}] 预订过程中发生错误: {str(e)}\n{traceback.format_exc()}")
+            return OrderResult(selected_fields)
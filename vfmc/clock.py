@@ -0,0 +1,113 @@
+import time
+import logging
+from typing import TYPE_CHECKING, Callable, List, Optional
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROBE_URL = 'http://vfmc.tju.edu.cn/Field/GetVenueStateNew'
+
+
+@dataclass
+class ClockSample:
+    """一次对时采样：本地发送/接收时刻与服务器 Date 头（秒精度）
+    """
+    send: float
+    recv: float
+    server: float
+
+    @property
+    def rtt(self) -> float:
+        return self.recv - self.send
+
+
+@dataclass
+class ClockOffset:
+    """对时结果：offset 为服务器时间减本地时间（秒），真实偏差落在 offset ± error 之内
+    """
+    offset: float
+    error: float
+    rtt: float
+    samples: int
+
+
+class ClockSync:
+    """基于 HTTP Date 头估计本地与场馆服务器的时钟偏差
+
+    Date 头只有秒精度，单次采样只能说明服务器时间在 [Date, Date + 1) 内，且该时刻
+    落在本地的 [send, recv] 之间，因此偏差落在 [Date - recv, Date + 1 - send] 区间内。
+    多次采样取区间交集即可收紧误差；后续采样会挑选发送时机，让服务器恰好在当前
+    估计的整秒边界处理请求，每次采样大约把区间缩小一半。
+    """
+
+    def __init__(self, session: Optional['requests.Session'] = None, url: str = DEFAULT_PROBE_URL,
+                 samples: int = 6, timeout: float = 5,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep):
+        if session is None:
+            import requests  # 只在需要时导入，保持 import vfmc 轻量
+            session = requests.Session()
+        self.session = session
+        self.url = url
+        self.samples = samples
+        self.timeout = timeout
+        self.clock = clock
+        self.sleep = sleep
+
+    def sample(self) -> ClockSample:
+        """发送一次轻量的 HEAD 请求并记录 Date 头
+        """
+        send = self.clock()
+        response = self.session.head(self.url, timeout=self.timeout, allow_redirects=False)
+        recv = self.clock()
+        server = parsedate_to_datetime(response.headers['Date']).timestamp()
+        return ClockSample(send=send, recv=recv, server=server)
+
+    @staticmethod
+    def combine(samples: List[ClockSample]) -> Optional[ClockOffset]:
+        """由多次采样计算偏差估计与误差上界
+        """
+        if not samples:
+            return None
+
+        rtt = min(sample.rtt for sample in samples)
+        lower = max(sample.server - sample.recv for sample in samples)
+        upper = min(sample.server + 1 - sample.send for sample in samples)
+
+        if lower > upper:
+            # 区间没有交集（服务器时间跳变或网络抖动），退化为取各次中点的中位数
+            middles = sorted(sample.server + 0.5 - (sample.send + sample.recv) / 2 for sample in samples)
+            return ClockOffset(offset=middles[len(middles) // 2], error=0.5 + rtt / 2, rtt=rtt,
+                               samples=len(samples))
+
+        return ClockOffset(offset=(lower + upper) / 2, error=(upper - lower) / 2, rtt=rtt, samples=len(samples))
+
+    def estimate(self) -> Optional[ClockOffset]:
+        """连续采样并返回偏差估计，全部采样失败时返回 None
+        """
+        func_name = "estimate"
+        samples = []
+
+        for attempt in range(self.samples):
+            estimate = self.combine(samples)
+            if estimate is not None:
+                # 让请求到达服务器的时刻对准当前估计下的整秒边界
+                arrival = self.clock() + estimate.rtt / 2 + estimate.offset
+                self.sleep(1 - arrival % 1)
+
+            try:
+                samples.append(self.sample())
+            except (OSError, KeyError, TypeError, ValueError) as e:  # requests 的异常都是 OSError 的子类
+                logger.warning(f"[{func_name}] 对时采样失败 (尝试 {attempt + 1}/{self.samples}): {str(e)}")
+
+        estimate = self.combine(samples)
+        if estimate is None:
+            logger.error(f"[{func_name}] 对时失败，将使用本地时间")
+        else:
+            logger.info(
+                f"[{func_name}] 服务器时间偏差 {estimate.offset * 1000:+.1f} 毫秒，误差 ±{estimate.error * 1000:.1f} 毫秒，"
+                f"往返时间 {estimate.rtt * 1000:.1f} 毫秒（{estimate.samples} 次采样）")
+        return estimate
@@ -0,0 +1,37 @@
+from types import MappingProxyType
+from typing import Mapping
+from dataclasses import dataclass
+
+DEFAULT_DATEADD = 7  # 表示从今天开始往后推 dateadd 天的日子 例子：今天是11.23，获取11.29的票dateadd=5
+DEFAULT_VENUE_NO = '005'  # 005表示北洋园体育馆
+DEFAULT_FIELD_TYPE_NO = '017'  # 017表示羽毛球场
+
+
+@dataclass(frozen=True)
+class BookingConfig:
+    """预订配置类，创建后不可修改，cookies 也以只读映射保存
+    """
+    dateadd: int
+    TimePeriod: int
+    VenueNo: str
+    FieldTypeNo: str
+    cookies: Mapping[str, str]
+
+    def __post_init__(self):
+        if not self.validate_time_period(self.TimePeriod):
+            raise ValueError(f"TimePeriod 只能是 0、1 或 2，当前为 {self.TimePeriod!r}")
+        object.__setattr__(self, 'cookies', MappingProxyType(dict(self.cookies)))
+
+    @staticmethod
+    def validate_time_period(time_period: int) -> bool:
+        return time_period in [0, 1, 2]
+
+    @classmethod
+    def create_default(cls, cookies: Mapping[str, str], time_period: int = 1) -> 'BookingConfig':
+        return cls(
+            dateadd=DEFAULT_DATEADD,
+            TimePeriod=time_period,  # 0表示上午 1表示下午 2表示晚上
+            VenueNo=DEFAULT_VENUE_NO,
+            FieldTypeNo=DEFAULT_FIELD_TYPE_NO,
+            cookies=cookies
+        )
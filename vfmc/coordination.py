@@ -0,0 +1,90 @@
+"""同一进程中全部预订任务共享的场地分配
+
+各任务独立查询和选择时，偏好相同的两个任务会选中同一个时段，其中一个必然失败。协调器在选择时跳过其他任务
+已认领或已预订的时段，选中后在同一次加锁中认领，因此两个任务不会同时对同一个时段下单；
+偏好重叠的任务依次分得排名靠前的不同时段。
+
+时段由 (场馆, 场地类型, dateadd) 与 (场地编号, 开始分钟数) 确定，不同场馆或日期的任务互不影响。
+"""
+import threading
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from .config import BookingConfig
+from .policy import SelectionPolicy
+from .slots import Slot, SlotIndex, to_minutes
+
+Scope = Tuple[str, str, int]
+Position = Tuple[str, int]
+
+
+def scope_of(config: BookingConfig) -> Scope:
+    return config.VenueNo, config.FieldTypeNo, config.dateadd
+
+
+def position_of(slot) -> Position:
+    """Slot 或接口返回的场地字典对应的 (场地编号, 开始分钟数)
+    """
+    return slot["FieldNo"], to_minutes(slot["BeginTime"])
+
+
+class SlotCoordinator:
+    """全部任务共享的场地认领表，可以同时被多个线程和协程使用
+
+    claim 选出并认领场地；下单后 settle 发布预订成功的时段、释放其余的认领；任务结束时 release 释放它的全部认领。
+    每个任务同一时间只持有最近一次 claim 的认领。认领被释放时 version 加一，任务据此判断其他任务释放的时段是否可能让
+    上一次的选择结果发生变化。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.claims: Dict[Scope, Dict[Position, str]] = {}  # 已认领、尚未下单完成的时段 -> 任务名
+        self.booked: Dict[Scope, Dict[Position, str]] = {}  # 本进程中已预订成功的时段 -> 任务名
+        self.version = 0  # settle 或 release 释放认领的次数
+
+    def _drop(self, job: str, scope: Scope) -> int:
+        claims = self.claims.get(scope)
+        if not claims:
+            return 0
+        dropped = [position for position, owner in claims.items() if owner == job]
+        for position in dropped:
+            del claims[position]
+        return len(dropped)
+
+    def claim(self, job: str, config: BookingConfig, policy: SelectionPolicy,
+              index: SlotIndex) -> Optional[Tuple[Slot, ...]]:
+        """跳过其他任务已认领或已预订的时段，按选择策略选出场地并认领，没有可选的场地时返回 None
+        """
+        scope = scope_of(config)
+        with self.lock:
+            self._drop(job, scope)
+            claims = self.claims.setdefault(scope, {})
+            exclude: Set[Position] = set(self.booked.get(scope, ()))
+            exclude.update(position for position, owner in claims.items() if owner != job)
+            selected = policy.select(index, exclude)
+            if selected:
+                for slot in selected:
+                    claims[slot.field_no, slot.begin] = job
+            return selected
+
+    def settle(self, job: str, config: BookingConfig, booked: Iterable = ()):
+        """下单完成：发布预订成功的时段，其他任务不再选择它们，并释放该任务的其余认领
+        """
+        scope = scope_of(config)
+        with self.lock:
+            if self._drop(job, scope):
+                self.version += 1
+            for slot in booked:
+                self.booked.setdefault(scope, {})[position_of(slot)] = job
+
+    def release(self, job: str):
+        """释放任务的全部认领，任务结束时调用
+        """
+        with self.lock:
+            if sum(self._drop(job, scope) for scope in self.claims):
+                self.version += 1
+
+    def booked_by(self, config: BookingConfig) -> Dict[Position, str]:
+        """本进程中已预订成功的时段及预订它们的任务
+        """
+        with self.lock:
+            return dict(self.booked.get(scope_of(config), {}))
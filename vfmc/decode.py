@@ -0,0 +1,112 @@
+"""场馆状态接口的解码
+
+GetVenueStateNew 的 resultdata 是编码成字符串的 JSON 数组。常规做法要先解析整个响应、再解析一遍 resultdata，
+得到全部场地的字典后才按 FieldState 过滤。这里直接在原始字节上定位 resultdata，只截取可预订的行，一次解码后转换为 Slot；
+完整的场地目录（推测下单与目录缓存需要）保留原始字节，第一次用到时才解码。
+
+安装了 orjson 时用它解析，否则使用标准库 json。响应不是预期的格式时退回到常规的两次解析。
+
+    python -m vfmc.microbench decode --fields 50,500,1500
+"""
+import re
+import json
+from typing import Callable, Dict, List, Optional, Sequence
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    orjson = None
+
+from .slots import Slot
+
+Loads = Callable[[bytes], object]
+
+loads: Loads = orjson.loads if orjson is not None else json.loads
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+FREE = "0"  # FieldState 为 "0" 表示可预订
+
+# resultdata 在响应中是转义后的字符串，其中的引号写作 \"
+_FIELD_STATE = b'FieldState\\"'
+_FREE_MARKER = re.compile(rb'FieldState\\"\s*:\s*\\"')
+_SAMPLE_BYTES = 64 * 1024  # 估计可预订比例时检查的长度
+
+
+class VenueState:
+    """一次场馆状态查询的解码结果：errorcode、message、场地总数与可预订的时段
+    """
+    __slots__ = ('errorcode', 'message', 'rows', 'free', '_raw', '_catalogue', '_loads')
+
+    def __init__(self, errorcode, message: Optional[str], rows: int = 0, free: Sequence[Slot] = (),
+                 raw: Optional[bytes] = None, catalogue: Optional[List[Dict]] = None, loads: Loads = loads):
+        self.errorcode = errorcode
+        self.message = message
+        self.rows = rows
+        self.free = free
+        self._raw = raw  # 转义状态的 resultdata 原始字节
+        self._catalogue = catalogue
+        self._loads = loads
+
+    def catalogue(self) -> List[Dict]:
+        """完整的场地目录（包括不可预订的场地），第一次调用时才解码
+        """
+        if self._catalogue is None:
+            self._catalogue = self._loads(self._loads(b'"' + self._raw + b'"')) if self._raw else []
+        return self._catalogue
+
+
+def decode_venue_state(body: bytes, loads: Loads = loads) -> VenueState:
+    """把场馆状态接口的原始响应解码为 VenueState
+    """
+    try:
+        return _scan(body, loads)
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return decode_two_pass(body, loads)
+
+
+def decode_two_pass(body: bytes, loads: Loads = loads) -> VenueState:
+    """常规解码：整个响应与 resultdata 各解析一次，再按 FieldState 过滤
+    """
+    document = loads(body)
+    rows = loads(document.get("resultdata") or "[]")
+    free = [Slot.from_row(row) for row in rows if row.get("FieldState") == FREE]
+    return VenueState(document.get("errorcode"), document.get("message"), len(rows), free,
+                      catalogue=rows, loads=loads)
+
+
+def _scan(body: bytes, loads: Loads) -> VenueState:
+    """在原始字节上截取 resultdata 与其中可预订的行
+
+    resultdata 中的引号都被转义，因此未转义的 ]" 只会出现在它的结尾；每一行都是不含嵌套的对象，
+    从 FieldState 的位置向前找 {、向后找 } 即得到整行。截取到的内容不符合预期时解码会失败，由调用方退回到常规解码。
+    可预订的行超过一半时逐行截取不再划算，改用常规解码。
+    """
+    key = body.index(b'"resultdata"')
+    start = body.index(b'"', body.index(b':', key + 12)) + 1
+    first = body.find(_FIELD_STATE, start)
+    if first >= 0:
+        # 按第一行的写法确定标记，兼容冒号前后有无空格
+        marker = _FREE_MARKER.match(body, first).group() + FREE.encode() + b'\\"'
+        # 用开头一段估计可预订的比例：大部分场地可预订时（例如刚开放时）逐行截取反而更慢，改用常规解码
+        sample = start + _SAMPLE_BYTES
+        if body.count(marker, start, sample) * 2 > body.count(_FIELD_STATE, start, sample):
+            return decode_two_pass(body, loads)
+
+    end = start if body[start:start + 1] == b'"' else body.index(b']"', start) + 1
+    # 其余字段很少，把 resultdata 替换为空字符串后正常解析
+    document = loads(body[:start] + body[end:])
+    raw = body[start:end]
+    rows = raw.count(_FIELD_STATE)
+    if not rows:
+        return VenueState(document["errorcode"], document.get("message"), 0, [], raw=raw, loads=loads)
+
+    parts = []
+    position = raw.find(marker)
+    while position >= 0:
+        begin = raw.rindex(b'{', 0, position)
+        close = raw.index(b'}', position) + 1
+        parts.append(raw[begin:close])
+        position = raw.find(marker, close)
+
+    free = [Slot.from_row(row) for row in loads(loads(b'"[' + b','.join(parts) + b']"'))] if parts else []
+    return VenueState(document["errorcode"], document.get("message"), rows, free, raw=raw, loads=loads)
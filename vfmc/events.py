@@ -0,0 +1,196 @@
+"""结构化事件日志：每次查询、选择、下单与每次尝试结束时各写一行 JSON
+
+每行都带有本次运行的编号 run、任务名 job、尝试序号 attempt、墙上时间 wall_time、相对尝试开始的单调时钟毫秒数 elapsed，
+以及各事件自己的字段：
+
+    fetch   status, errorcode, message, rows（场地总数）, free（可预订数）, freed（新空出数）, taken（不再可预订数）, ms, error
+    select  candidates（可预订数）, selected（选中的时段数）, fields, begin, end
+    order   status, errorcode, message, slots, booked, failed, ms, error
+    attempt outcome
+
+设置了限流器时 fetch 与 order 还带有 wait_ms（请求发出前在限流器中等待的毫秒数，不计入 ms）。
+
+写入经过缓冲：业务线程只把事件放入内存队列，后台线程定期序列化并批量写入文件。
+
+    python -m vfmc analyze events.jsonl
+"""
+import os
+import sys
+import json
+import argparse
+import threading
+from collections import Counter, defaultdict, deque
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .stats import summarize
+
+
+class EventLog:
+    """追加写入的 JSON Lines 事件日志，可以被多个线程和协程同时使用
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.run_id = f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        self.pending = deque()  # deque.append 是线程安全的，业务线程不需要加锁
+        self.file = open(path, 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='EventLog', daemon=True)
+        self.thread.start()
+
+    def emit(self, event: Dict):
+        self.pending.append(event)
+
+    def _run(self):
+        while not self.closed.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """把队列中的事件写入文件
+        """
+        with self.lock:
+            lines = []
+            while self.pending:
+                lines.append(json.dumps({"run": self.run_id, **self.pending.popleft()}, ensure_ascii=False))
+            if lines and not self.file.closed:
+                self.file.write("\n".join(lines) + "\n")
+                self.file.flush()
+
+    def close(self):
+        self.closed.set()
+        self.thread.join()
+        self.flush()
+        with self.lock:
+            self.file.close()
+
+    def __enter__(self) -> 'EventLog':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_events(paths: Iterable[str]) -> Iterator[Dict]:
+    """逐行读取事件，跳过无法解析的行（例如进程被强制结束时写了一半的最后一行）
+    """
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(event, dict) and "event" in event:
+                    yield event
+
+
+def _night(event: Dict) -> str:
+    return datetime.fromtimestamp(event.get("wall_time", 0)).strftime('%Y-%m-%d')
+
+
+def analyze(events: Iterable[Dict]) -> Dict[str, Dict]:
+    """按日期汇总每晚的查询/下单耗时分布、尝试结果、接口返回的错误以及从首次请求到预订成功的耗时
+    """
+    nights = defaultdict(lambda: defaultdict(list))
+    for event in events:
+        nights[_night(event)][event["event"]].append(event)
+
+    result = {}
+    for night in sorted(nights):
+        groups = nights[night]
+        fetches = groups.get("fetch", [])
+        orders = groups.get("order", [])
+        selects = groups.get("select", [])
+        attempts = groups.get("attempt", [])
+
+        # 同一晚可能运行多次，任务按 (run, job) 区分
+        first_seen = {}
+        booked_at = {}
+        for event in sorted((event for group in groups.values() for event in group),
+                            key=lambda event: event.get("wall_time", 0)):
+            job = (event.get("run"), event.get("job"))
+            first_seen.setdefault(job, event["wall_time"])
+            if event["event"] == "order" and event.get("booked") and job not in booked_at:
+                booked_at[job] = event["wall_time"]
+
+        result[night] = {
+            "jobs": len(first_seen),
+            "booked_jobs": len(booked_at),
+            "attempts": len(attempts),
+            "outcomes": dict(Counter(event.get("outcome") for event in attempts)),
+            "fetch": {
+                "count": len(fetches),
+                "ms": summarize([event["ms"] for event in fetches if "ms" in event]),
+                "wait_ms": summarize([event["wait_ms"] for event in fetches if "wait_ms" in event]),
+                "status": dict(Counter(str(event.get("status")) for event in fetches)),
+                "errorcode": dict(Counter(str(event.get("errorcode")) for event in fetches)),
+                "free": summarize([event["free"] for event in fetches if "free" in event]),
+                "unchanged": sum(1 for event in fetches if event.get("freed") == 0 and event.get("taken") == 0),
+            },
+            "select": {
+                "count": len(selects),
+                "candidates": summarize([event["candidates"] for event in selects if "candidates" in event]),
+                "empty": sum(1 for event in selects if not event.get("selected")),
+            },
+            "order": {
+                "count": len(orders),
+                "ms": summarize([event["ms"] for event in orders if "ms" in event]),
+                "wait_ms": summarize([event["wait_ms"] for event in orders if "wait_ms" in event]),
+                "status": dict(Counter(str(event.get("status")) for event in orders)),
+                "messages": dict(Counter(event.get("message") or event.get("error") or ""
+                                         for event in orders if not event.get("booked")).most_common(10)),
+                "booked_slots": sum(event.get("booked", 0) for event in orders),
+            },
+            "time_to_book_ms": summarize([(booked_at[job] - first_seen[job]) * 1000 for job in booked_at]),
+        }
+    return result
+
+
+def format_report(result: Dict[str, Dict]) -> str:
+    """每晚一段的文字报告（耗时为 p50/p90/max 毫秒）
+    """
+    def spread(summary: Dict) -> str:
+        if not summary.get("n"):
+            return "-"
+        return f"{summary['p50']:.1f}/{summary['p90']:.1f}/{summary['max']:.1f}"
+
+    lines = []
+    for night, stats in result.items():
+        lines.append(f"{night}: {stats['booked_jobs']}/{stats['jobs']} 个任务预订成功，共 {stats['attempts']} 次尝试 "
+                     f"{stats['outcomes']}")
+        lines.append(f"  查询 {stats['fetch']['count']} 次（{stats['fetch']['unchanged']} 次无变化），"
+                     f"耗时 {spread(stats['fetch']['ms'])}，"
+                     f"HTTP {stats['fetch']['status']}，errorcode {stats['fetch']['errorcode']}")
+        candidates = stats['select']['candidates']
+        lines.append(f"  选择 {stats['select']['count']} 次，候选场地中位数 {candidates.get('p50', 0):.0f}，"
+                     f"未选出 {stats['select']['empty']} 次")
+        lines.append(f"  下单 {stats['order']['count']} 次，耗时 {spread(stats['order']['ms'])}，"
+                     f"成功 {stats['order']['booked_slots']} 个时段")
+        for message, count in stats['order']['messages'].items():
+            lines.append(f"    失败 {count} 次：{message}")
+        if stats['fetch']['wait_ms'].get("n") or stats['order']['wait_ms'].get("n"):
+            lines.append(f"  限流等待 查询 {spread(stats['fetch']['wait_ms'])}，下单 {spread(stats['order']['wait_ms'])}")
+        lines.append(f"  首次请求到预订成功 {spread(stats['time_to_book_ms'])}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='按日期统计事件日志')
+    parser.add_argument('paths', nargs='+', help='事件日志文件（JSON Lines）')
+    parser.add_argument('--json', action='store_true', help='输出 JSON')
+    args = parser.parse_args(argv)
+
+    result = analyze(read_events(args.paths))
+    if args.json:
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print(format_report(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,491 @@
+"""预订任务文件：用 TOML 或 YAML 描述账号、开抢时间和每个预订任务
+
+启动时一次性读取并校验，得到不可修改的 BookingConfig 与 BookingJob；配置有误时列出全部问题，
+可以提前用 validate 命令检查，不必等到开抢时才发现。
+
+    python -m vfmc.jobs validate jobs.toml
+    python -m vfmc.jobs validate jobs.toml --check-login
+
+文件格式见仓库根目录的 jobs.example.toml。
+"""
+import os
+import sys
+import logging
+import argparse
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+try:
+    import tomllib
+except ImportError:  # Python 3.11 之前的版本可以安装 tomli
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+try:
+    import yaml
+except ImportError:  # YAML 格式为可选功能，未安装 PyYAML 时只能使用 TOML
+    yaml = None
+
+from .config import BookingConfig, DEFAULT_DATEADD, DEFAULT_VENUE_NO, DEFAULT_FIELD_TYPE_NO
+from .policy import Preference, SelectionPolicy
+from .polling import PollConfig
+from .ratelimit import ENDPOINTS, RateLimit, RateLimitConfig
+from .scheduler import ScheduleConfig
+from .slots import to_minutes
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('threaded', 'async')
+REQUIRED_COOKIES = ('UserId', 'JWTUserToken')  # 缺少时接口返回未登录
+
+
+class JobFileError(ValueError):
+    """任务文件无法读取或没有通过校验，errors 中是全部问题
+    """
+
+    def __init__(self, path: str, errors: List[str]):
+        self.path = path
+        self.errors = errors
+        super().__init__(f"{path}: " + "; ".join(errors))
+
+
+@dataclass(frozen=True)
+class TimingBudget:
+    """单个任务开抢后的尝试预算，两次尝试之间的间隔由 poll 决定，见 retry.RetryPolicy
+    """
+    max_attempts: int = 50  # 最多尝试次数
+    deadline: float = 300.0  # 开抢后最多继续尝试的时间（秒），超过后立即结束
+    request_timeout: float = 10.0  # 单次请求的超时上限（秒），临近截止时间时自动缩短
+    poll: PollConfig = PollConfig()
+
+
+@dataclass(frozen=True)
+class CancellationConfig:
+    """退订监视模式：开抢结束后长时间低频查询，有人退订、匹配的场地重新出现时立即下单
+    """
+    hours: float = 24.0  # 每个任务最多监视多久（小时）
+    requests_per_minute: int = 4  # 每个任务每分钟的请求数（查询与下单合计）上限
+    poll_interval: float = 30.0  # 两次查询之间的间隔（秒）
+    request_timeout: float = 10.0  # 单次请求的超时（秒）
+
+
+@dataclass(frozen=True)
+class BookingJob:
+    """一个预订任务：使用哪个账号、预订哪里的场地、按什么偏好选择、尝试多久
+    """
+    name: str
+    config: BookingConfig
+    policy: SelectionPolicy
+    timing: TimingBudget = TimingBudget()
+    speculative: bool = True  # 开抢时先对已知场地目录中的首选场地直接下单
+
+
+@dataclass(frozen=True)
+class JobFile:
+    """整个任务文件：开抢时间、运行方式以及全部任务
+    """
+    path: str
+    schedule: ScheduleConfig
+    jobs: Tuple[BookingJob, ...]
+    backend: str = 'threaded'
+    catalogue: Optional[str] = 'catalogue.db'  # 场地目录缓存文件，为空时不使用
+    trace: bool = True  # 每次尝试输出一行各阶段耗时的 JSON
+    events: Optional[str] = None  # 结构化事件日志文件（JSON Lines），为空时不记录
+    coordinate: bool = True  # 各任务通过共享的认领表分配场地，不对同一个时段重复下单
+    cancellations: CancellationConfig = CancellationConfig()  # 退订监视模式的参数
+    rate_limit: RateLimitConfig = RateLimitConfig()  # 全部任务共享的限流参数
+
+
+def read_document(path: str) -> Dict:
+    """按扩展名解析 TOML 或 YAML 文件
+    """
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == '.toml':
+            if tomllib is None:
+                raise JobFileError(path, ["读取 TOML 需要 Python 3.11 以上版本或安装 tomli"])
+            with open(path, 'rb') as f:
+                document = tomllib.load(f)
+        elif extension in ('.yaml', '.yml'):
+            if yaml is None:
+                raise JobFileError(path, ["读取 YAML 需要安装 PyYAML"])
+            with open(path, encoding='utf-8') as f:
+                document = yaml.safe_load(f) or {}
+        else:
+            raise JobFileError(path, [f"不支持的文件类型 {extension or '（无扩展名）'}，请使用 .toml、.yaml 或 .yml"])
+    except OSError as e:
+        raise JobFileError(path, [f"无法读取文件: {e}"])
+    except JobFileError:
+        raise
+    except Exception as e:  # tomllib.TOMLDecodeError / yaml.YAMLError
+        raise JobFileError(path, [f"文件格式错误: {e}"])
+    if not isinstance(document, dict):
+        raise JobFileError(path, ["文件顶层必须是键值表"])
+    return document
+
+
+class _Checker:
+    """收集校验过程中的全部问题，而不是遇到第一个就停止
+    """
+
+    def __init__(self):
+        self.errors = []
+
+    def error(self, where: str, message: str):
+        self.errors.append(f"{where}: {message}")
+
+    def table(self, where: str, value: Any, allowed: Tuple[str, ...]) -> Dict:
+        if value is None:
+            return {}
+        if not isinstance(value, dict):
+            self.error(where, "必须是键值表")
+            return {}
+        for key in value:
+            if key not in allowed:
+                self.error(where, f"未知的配置项 {key!r}，可用的配置项为 {', '.join(allowed)}")
+        return value
+
+    def number(self, where: str, value: Any, kind: type, minimum: float = None, maximum: float = None):
+        # bool 是 int 的子类，true/false 不能当作数字
+        if isinstance(value, bool) or not isinstance(value, (int, float) if kind is float else int):
+            self.error(where, f"必须是{'数字' if kind is float else '整数'}，当前为 {value!r}")
+            return None
+        if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            bounds = f"{minimum if minimum is not None else ''}~{maximum if maximum is not None else ''}"
+            self.error(where, f"超出范围 {bounds}，当前为 {value!r}")
+            return None
+        return kind(value)
+
+    def string(self, where: str, value: Any) -> Optional[str]:
+        if not isinstance(value, str) or not value:
+            self.error(where, f"必须是非空字符串，当前为 {value!r}")
+            return None
+        return value
+
+    def boolean(self, where: str, value: Any) -> Optional[bool]:
+        if not isinstance(value, bool):
+            self.error(where, f"必须是 true 或 false，当前为 {value!r}")
+            return None
+        return value
+
+    def clock(self, where: str, value: Any) -> Optional[str]:
+        if not isinstance(value, str) or len(value) != 5 or value[2] != ':' \
+                or not (value[:2] + value[3:]).isdigit() or int(value[:2]) > 23 or int(value[3:]) > 59:
+            self.error(where, f"时间必须写成 HH:MM，当前为 {value!r}")
+            return None
+        return value
+
+
+PREFERENCE_KEYS = ('time', 'earliest', 'latest', 'fields', 'max_price', 'consecutive')
+TIMING_KEYS = tuple(field.name for field in fields(TimingBudget))
+POLL_KEYS = tuple(field.name for field in fields(PollConfig))
+SCHEDULE_KEYS = tuple(field.name for field in fields(ScheduleConfig))
+CANCELLATION_KEYS = tuple(field.name for field in fields(CancellationConfig))
+RATE_LIMIT_KEYS = ('enabled',) + ENDPOINTS
+RATE_KEYS = tuple(field.name for field in fields(RateLimit))
+RUN_KEYS = ('backend', 'catalogue', 'trace', 'events', 'speculative', 'coordinate')
+JOB_KEYS = ('name', 'account', 'cookies', 'venue_no', 'field_type_no', 'time_period', 'dateadd',
+            'preferences', 'fallback', 'speculative', 'timing')
+TOP_LEVEL_KEYS = ('schedule', 'run', 'rate_limit', 'cancellations', 'accounts', 'jobs')
+
+
+def _parse_time_spec(checker: _Checker, where: str, spec: Any) -> Dict[str, str]:
+    """"16:00"、"16:00-18:00" 转换为 earliest/latest
+    """
+    if not isinstance(spec, str):
+        checker.error(where, f"必须是字符串，当前为 {spec!r}")
+        return {}
+    earliest, _, latest = spec.partition('-')
+    earliest = checker.clock(where, earliest.strip())
+    latest = checker.clock(where, latest.strip()) if latest else earliest
+    return {"earliest": earliest, "latest": latest}
+
+
+def _parse_preference(checker: _Checker, where: str, value: Any) -> Optional[Preference]:
+    if isinstance(value, str):
+        value = {'time': value}
+    value = checker.table(where, value, PREFERENCE_KEYS)
+    arguments = {}
+    if 'time' in value:
+        if 'earliest' in value or 'latest' in value:
+            checker.error(where, "time 与 earliest/latest 不能同时使用")
+        arguments.update(_parse_time_spec(checker, f"{where}.time", value['time']))
+    for key in ('earliest', 'latest'):
+        if key in value:
+            arguments[key] = checker.clock(f"{where}.{key}", value[key])
+    if arguments.get('earliest') and arguments.get('latest') \
+            and to_minutes(arguments['earliest']) > to_minutes(arguments['latest']):
+        checker.error(where, f"开始时间范围为空：{arguments['earliest']} 晚于 {arguments['latest']}")
+    if 'fields' in value:
+        field_list = value['fields']
+        if isinstance(field_list, str):
+            field_list = [field_list]
+        if not isinstance(field_list, list) or not all(isinstance(field, str) and field for field in field_list):
+            checker.error(f"{where}.fields", "必须是场地编号或场地名称的列表")
+        else:
+            arguments['fields'] = tuple(field_list)
+    if 'max_price' in value:
+        arguments['max_price'] = checker.number(f"{where}.max_price", value['max_price'], float, minimum=0)
+    if 'consecutive' in value:
+        arguments['consecutive'] = checker.number(f"{where}.consecutive", value['consecutive'], int, 1, 24)
+    if None in arguments.values():
+        return None
+    try:
+        return Preference(**arguments)
+    except ValueError as e:
+        checker.error(where, str(e))
+        return None
+
+
+def _parse_cookies(checker: _Checker, where: str, value: Any) -> Dict[str, str]:
+    if not isinstance(value, dict):
+        checker.error(where, "必须是键值表")
+        return {}
+    cookies = {}
+    for key, item in value.items():
+        if not isinstance(item, (str, int)) or isinstance(item, bool):
+            checker.error(f"{where}.{key}", f"必须是字符串，当前为 {item!r}")
+            continue
+        cookies[key] = str(item)
+    for key in REQUIRED_COOKIES:
+        if not cookies.get(key):
+            checker.error(where, f"缺少 {key} 或为空，接口会返回未登录")
+    return cookies
+
+
+def _parse_job(checker: _Checker, where: str, value: Any, accounts: Mapping[str, Dict],
+               index: int, defaults: Dict) -> Optional[BookingJob]:
+    value = checker.table(where, value, JOB_KEYS)
+    errors_before = len(checker.errors)
+
+    name = checker.string(f"{where}.name", value.get('name', f"job{index}"))
+
+    if ('account' in value) == ('cookies' in value):
+        checker.error(where, "必须且只能设置 account 或 cookies 之一")
+        cookies = {}
+    elif 'account' in value:
+        cookies = accounts.get(value['account'])
+        if cookies is None:
+            checker.error(f"{where}.account", f"未定义的账号 {value['account']!r}")
+            cookies = {}
+    else:
+        cookies = _parse_cookies(checker, f"{where}.cookies", value['cookies'])
+
+    venue_no = checker.string(f"{where}.venue_no", value.get('venue_no', DEFAULT_VENUE_NO))
+    field_type_no = checker.string(f"{where}.field_type_no", value.get('field_type_no', DEFAULT_FIELD_TYPE_NO))
+    time_period = checker.number(f"{where}.time_period", value.get('time_period', 1), int, 0, 2)
+    dateadd = checker.number(f"{where}.dateadd", value.get('dateadd', DEFAULT_DATEADD), int, 0, 30)
+
+    preferences = value.get('preferences', [])
+    if isinstance(preferences, (str, dict)):
+        preferences = [preferences]
+    if not isinstance(preferences, list):
+        checker.error(f"{where}.preferences", "必须是偏好列表")
+        preferences = []
+    parsed = [_parse_preference(checker, f"{where}.preferences[{number}]", preference)
+              for number, preference in enumerate(preferences)]
+    fallback = checker.boolean(f"{where}.fallback", value.get('fallback', True))
+    speculative = checker.boolean(f"{where}.speculative", value.get('speculative', defaults['speculative']))
+
+    timing = checker.table(f"{where}.timing", value.get('timing'), TIMING_KEYS)
+    poll = checker.table(f"{where}.timing.poll", timing.get('poll'), POLL_KEYS)
+    poll_values = {}
+    for field in fields(PollConfig):
+        if field.name not in poll:
+            continue
+        if field.name == 'max_requests':
+            poll_values[field.name] = checker.number(f"{where}.timing.poll.{field.name}", poll[field.name], int, 1)
+        else:
+            poll_values[field.name] = checker.number(f"{where}.timing.poll.{field.name}", poll[field.name], float,
+                                                     1 if field.name == 'backoff' else 0)
+    timing = TimingBudget(
+        max_attempts=checker.number(f"{where}.timing.max_attempts", timing.get('max_attempts', 50), int, 1),
+        deadline=checker.number(f"{where}.timing.deadline", timing.get('deadline', 300.0), float, 0),
+        request_timeout=checker.number(f"{where}.timing.request_timeout", timing.get('request_timeout', 10.0),
+                                       float, 0.5),
+        poll=PollConfig(**{key: value for key, value in poll_values.items() if value is not None}),
+    )
+
+    if len(checker.errors) > errors_before:
+        return None
+    return BookingJob(
+        name=name,
+        config=BookingConfig(dateadd=dateadd, TimePeriod=time_period, VenueNo=venue_no, FieldTypeNo=field_type_no,
+                             cookies=cookies),
+        policy=SelectionPolicy(parsed, fallback=fallback),
+        timing=timing,
+        speculative=speculative,
+    )
+
+
+def parse_job_file(document: Mapping, path: str = '<memory>') -> JobFile:
+    """校验已解析的文档并转换为 JobFile，有任何问题时抛出包含全部问题的 JobFileError
+    """
+    checker = _Checker()
+    document = checker.table('(顶层)', document, TOP_LEVEL_KEYS)
+
+    schedule_table = checker.table('schedule', document.get('schedule'), SCHEDULE_KEYS)
+    schedule_values = {}
+    for field in fields(ScheduleConfig):
+        if field.name not in schedule_table:
+            continue
+        where = f"schedule.{field.name}"
+        item = schedule_table[field.name]
+        if field.type in (bool, 'bool'):
+            schedule_values[field.name] = checker.boolean(where, item)
+        elif field.name in ('hour', 'minute', 'second'):
+            schedule_values[field.name] = checker.number(where, item, int, 0, 23 if field.name == 'hour' else 59)
+        else:
+            schedule_values[field.name] = checker.number(where, item, float, 0)
+    schedule = ScheduleConfig(**{key: item for key, item in schedule_values.items() if item is not None})
+
+    run = checker.table('run', document.get('run'), RUN_KEYS)
+    backend = run.get('backend', 'threaded')
+    if backend not in BACKENDS:
+        checker.error('run.backend', f"只能是 {' 或 '.join(BACKENDS)}，当前为 {backend!r}")
+    catalogue = run.get('catalogue', 'catalogue.db')
+    if catalogue is not None and not isinstance(catalogue, str):
+        checker.error('run.catalogue', "必须是文件路径，留空字符串表示不使用场地目录缓存")
+    trace = checker.boolean('run.trace', run.get('trace', True))
+    events = run.get('events')
+    if events is not None and not isinstance(events, str):
+        checker.error('run.events', "必须是文件路径，留空字符串表示不记录事件")
+    coordinate = checker.boolean('run.coordinate', run.get('coordinate', True))
+    defaults = {'speculative': checker.boolean('run.speculative', run.get('speculative', True))}
+
+    rate_table = checker.table('rate_limit', document.get('rate_limit'), RATE_LIMIT_KEYS)
+    rate_values = {'enabled': checker.boolean('rate_limit.enabled', rate_table.get('enabled', True))}
+    for endpoint in ENDPOINTS:
+        where = f"rate_limit.{endpoint}"
+        table = checker.table(where, rate_table.get(endpoint), RATE_KEYS)
+        default = getattr(RateLimitConfig, endpoint)
+        rate_values[endpoint] = RateLimit(
+            rate=checker.number(f"{where}.rate", table.get('rate', default.rate), float, 0.1),
+            burst=checker.number(f"{where}.burst", table.get('burst', default.burst), int, 1),
+        )
+    rate_limit = RateLimitConfig(**rate_values)
+
+    cancellation_table = checker.table('cancellations', document.get('cancellations'), CANCELLATION_KEYS)
+    cancellation_values = {}
+    for field in fields(CancellationConfig):
+        if field.name not in cancellation_table:
+            continue
+        where = f"cancellations.{field.name}"
+        if field.name == 'requests_per_minute':
+            cancellation_values[field.name] = checker.number(where, cancellation_table[field.name], int, 1, 60)
+        else:
+            cancellation_values[field.name] = checker.number(where, cancellation_table[field.name], float,
+                                                             0.5 if field.name == 'request_timeout' else 0)
+    cancellations = CancellationConfig(**{key: item for key, item in cancellation_values.items() if item is not None})
+
+    accounts = {}
+    account_table = document.get('accounts', {})
+    if not isinstance(account_table, dict):
+        checker.error('accounts', "必须是键值表")
+        account_table = {}
+    for account, cookies in account_table.items():
+        accounts[account] = _parse_cookies(checker, f"accounts.{account}", cookies)
+
+    job_list = document.get('jobs')
+    if not isinstance(job_list, list) or not job_list:
+        checker.error('jobs', "至少需要一个预订任务")
+        job_list = []
+    jobs = [_parse_job(checker, f"jobs[{index}]", job, accounts, index, defaults)
+            for index, job in enumerate(job_list)]
+
+    names = [job.name for job in jobs if job is not None]
+    for name in sorted({name for name in names if names.count(name) > 1}):
+        checker.error('jobs', f"任务名称 {name!r} 重复")
+
+    if checker.errors:
+        raise JobFileError(path, checker.errors)
+    return JobFile(path=path, schedule=schedule, jobs=tuple(jobs), backend=backend,
+                   catalogue=catalogue or None, trace=trace, events=events or None, coordinate=coordinate,
+                   cancellations=cancellations,
+                   rate_limit=rate_limit)
+
+
+def load_job_file(path: str) -> JobFile:
+    """读取并校验任务文件
+    """
+    return parse_job_file(read_document(path), path)
+
+
+def check_login(job: BookingJob, timeout: float = 10) -> Optional[str]:
+    """用任务的 Cookie 查询一次场馆状态，登录有效时返回 None，否则返回错误信息
+    """
+    import requests
+
+    from .client import VenueBookingSystem
+
+    booking_system = VenueBookingSystem(job.config)
+    try:
+        response = booking_system.session.get(booking_system._venue_state_url(), timeout=timeout)
+        response.raise_for_status()
+        response_json = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return f"请求失败: {e}"
+    finally:
+        booking_system.close()
+    if response_json.get("errorcode") != 0:
+        return f"错误代码 {response_json.get('errorcode')}, 错误信息：{response_json.get('message')}"
+    return None
+
+
+def describe(job_file: JobFile) -> str:
+    """任务文件的概要，validate 通过后输出
+    """
+    schedule = job_file.schedule
+    lines = [f"开抢时间 {schedule.hour:02d}:{schedule.minute:02d}:{schedule.second:02d}，"
+             f"运行方式 {job_file.backend}，共 {len(job_file.jobs)} 个任务"]
+    for job in job_file.jobs:
+        config = job.config
+        preferences = ", ".join(
+            (preference.earliest if preference.earliest == preference.latest and preference.earliest
+             else f"{preference.earliest or '*'}-{preference.latest or '*'}")
+            + (f" x{preference.consecutive}" if preference.consecutive > 1 else "")
+            + (f" {'/'.join(preference.fields)}" if preference.fields else "")
+            + (f" <={preference.max_price:g}" if preference.max_price is not None else "")
+            for preference in job.policy.preferences) or "任意"
+        lines.append(f"  {job.name}: 用户 {config.cookies.get('UserId')} 场馆 {config.VenueNo} "
+                     f"类型 {config.FieldTypeNo} 时段 {config.TimePeriod} {config.dateadd} 天后，偏好 {preferences}")
+    return "\n".join(lines)
+
+
+def validate(path: str, login: bool = False) -> int:
+    """校验任务文件并输出概要或全部问题，login 为 True 时联网检查 Cookie，返回进程退出码
+    """
+    try:
+        job_file = load_job_file(path)
+    except JobFileError as e:
+        print(f"{e.path}: 发现 {len(e.errors)} 个问题", file=sys.stderr)
+        for error in e.errors:
+            print(f"  - {error}", file=sys.stderr)
+        return 1
+
+    print(describe(job_file))
+    if login:
+        failed = 0
+        for job in job_file.jobs:
+            problem = check_login(job)
+            print(f"  {job.name}: {'登录有效' if problem is None else problem}")
+            failed += problem is not None
+        if failed:
+            return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='预订任务文件工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    validate_parser = subparsers.add_parser('validate', help='校验任务文件')
+    validate_parser.add_argument('path', help='任务文件（.toml/.yaml/.yml）')
+    validate_parser.add_argument('--check-login', action='store_true', help='联网检查每个任务的 Cookie 是否有效')
+    args = parser.parse_args(argv)
+    return validate(args.path, args.check_login)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""日志初始化
+
+导入 vfmc 的任何模块都不会配置日志或创建日志文件，需要由入口显式调用 init_logging。
+默认使用队列：业务线程只把日志记录放入内存队列，格式化、写文件与刷新标准输出都在后台线程中完成，
+开抢时的查询与下单不会被磁盘或终端 I/O 阻塞。
+"""
+import sys
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime
+from typing import List, Optional, TextIO
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """进程内队列使用的 QueueHandler
+
+    标准实现在放入队列前会先格式化消息并丢弃异常信息（为了能跨进程传递），这部分工作发生在业务线程中；
+    队列只在本进程内使用，直接放入原始记录，格式化全部交给后台线程。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def default_log_file() -> str:
+    return f'booking_{datetime.now().strftime("%Y%m%d")}.log'
+
+
+def init_logging(log_file: Optional[str] = None, level: int = logging.INFO, use_queue: bool = True,
+                 fmt: str = LOG_FORMAT, stream: Optional[TextIO] = None) -> List[logging.Handler]:
+    """配置根日志：输出到 stream（默认为标准输出），log_file 不为空时同时写入文件，返回实际输出的 handler
+
+    可以重复调用，后一次调用会替换之前的配置。use_queue 为 False 时在调用线程中直接输出。
+    标准输出用于输出结果的入口（例如输出 JSON 的 bench）应传入 sys.stderr。
+    """
+    shutdown_logging()
+
+    formatter = logging.Formatter(fmt)
+    handlers = [logging.StreamHandler(sys.stdout if stream is None else stream)]
+    if log_file:
+        handlers.insert(0, logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(level)
+
+    if use_queue:
+        global _listener
+        log_queue = queue.SimpleQueue()
+        root.addHandler(_LocalQueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in handlers:
+            root.addHandler(handler)
+    return handlers
+
+
+def shutdown_logging():
+    """停止后台线程并输出队列中剩余的日志，进程退出时会自动调用
+    """
+    global _listener
+    if _listener is not None:
+        listener, _listener = _listener, None
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            if isinstance(handler, _LocalQueueHandler):
+                root.removeHandler(handler)
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+atexit.register(shutdown_logging)
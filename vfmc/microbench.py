@@ -0,0 +1,155 @@
+"""开抢关键路径上纯计算部分的微基准，不涉及网络
+
+    python -m vfmc.microbench select --fields 50,500,5000 --repeat 200
+    python -m vfmc.microbench decode --fields 50,500,1500 --repeat 50
+    python -m vfmc.microbench decode --payload state.json   # 保存下来的 GetVenueStateNew 原始响应
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+from typing import Callable, Dict, List, Sequence
+from datetime import datetime
+
+from . import decode
+from .mock_server import FREE, BOOKED, build_inventory
+from .stats import summarize
+from .policy import Preference, SelectionPolicy
+from .slots import Slot, SlotIndex
+
+# 选择策略基准使用的几组典型偏好
+POLICIES = {
+    "times": SelectionPolicy.from_preferred_time(["16:00", "17:00", "18:00", "19:00"]),
+    "windows": SelectionPolicy([
+        Preference(earliest="18:00", latest="20:00", fields=("YMQ003", "YMQ004"), max_price=30),
+        Preference(earliest="16:00", latest="21:00", max_price=30),
+    ]),
+    "consecutive": SelectionPolicy([
+        Preference(earliest="18:00", latest="20:00", consecutive=2, max_price=30),
+        Preference(earliest="16:00", latest="21:00", consecutive=2),
+        Preference(earliest="16:00", latest="21:00"),
+    ]),
+}
+
+
+def synthetic_snapshot(fields: int, free_ratio: float = 0.3, seed: int = 0,
+                       hours: Sequence[int] = range(8, 22)) -> SlotIndex:
+    """生成大型场馆的查询结果：fields 个场地、每小时一个时段，按 free_ratio 随机保留可预订的时段
+    """
+    rng = random.Random(seed)
+    slots = []
+    for hour in hours:
+        price = "20.00" if hour < 18 else "40.00" if hour >= 20 else "30.00"
+        for number in range(1, fields + 1):
+            if rng.random() < free_ratio:
+                slots.append(Slot(f"YMQ{number:03d}", '017', f"羽毛球{number}号场",
+                                  f"{hour:02d}:00", f"{hour + 1:02d}:00", price))
+    return SlotIndex(slots)
+
+
+def synthetic_payload(fields: int, free_ratio: float = 0.3, seed: int = 0) -> bytes:
+    """按场馆状态接口的格式生成大型场馆的原始响应：每个时段 fields 个场地，resultdata 是编码成字符串的场地列表
+    """
+    rng = random.Random(seed)
+    rows = [dict(row, FieldState=FREE if rng.random() < free_ratio else BOOKED)
+            for row in build_inventory(fields=fields)]
+    resultdata = json.dumps(rows, ensure_ascii=False, separators=(',', ':'))
+    return json.dumps({"errorcode": 0, "message": "", "resultdata": resultdata},
+                      ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _time_call(func: Callable, repeat: int) -> List[float]:
+    """重复调用 func，返回每次的耗时（微秒）
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1e6)
+    return durations
+
+
+def bench_select(field_counts: Sequence[int], repeat: int = 200, free_ratio: float = 0.3) -> Dict:
+    """对每种场地规模与每组偏好，统计 SelectionPolicy.select 的耗时，并与完整排序的结果核对
+    """
+    result = {}
+    for fields in field_counts:
+        index = synthetic_snapshot(fields, free_ratio=free_ratio)
+        sizes = result[str(fields)] = {"slots": len(index), "policies": {}}
+        for name, policy in POLICIES.items():
+            selected = policy.select(index)
+            ranked = policy.rank(index)
+            if (ranked[0] if ranked else None) != selected:
+                raise AssertionError(f"{name}: select 与 rank 的结果不一致")
+            sizes["policies"][name] = {
+                "selected": [repr(slot) for slot in selected or ()],
+                "select_us": summarize(_time_call(lambda: policy.select(index), repeat)),
+                "index_us": summarize(_time_call(lambda: SlotIndex(index.slots), max(repeat // 10, 1))),
+            }
+    return result
+
+
+def bench_decode(payloads: Dict[str, bytes], repeat: int = 50) -> Dict:
+    """对每个响应比较常规的两次解析与单次扫描的耗时（可用时分别使用 json 与 orjson），并核对解码结果一致
+    """
+    backends = {"json": json.loads}
+    if decode.orjson is not None:
+        backends["orjson"] = decode.orjson.loads
+
+    result = {}
+    for name, body in payloads.items():
+        expected = decode.decode_two_pass(body, json.loads)
+        entry = result[name] = {"bytes": len(body), "rows": expected.rows, "free": len(expected.free), "decoders": {}}
+        for backend, loads in backends.items():
+            for method, func in (("two_pass", decode.decode_two_pass), ("scan", decode.decode_venue_state)):
+                state = func(body, loads)
+                if [slot.key for slot in state.free] != [slot.key for slot in expected.free] \
+                        or state.rows != expected.rows or state.catalogue() != expected.catalogue():
+                    raise AssertionError(f"{name}: {method}/{backend} 的解码结果不一致")
+                entry["decoders"][f"{method}_{backend}"] = {
+                    "decode_us": summarize(_time_call(lambda: func(body, loads), repeat)),
+                    "catalogue_us": summarize(_time_call(lambda: func(body, loads).catalogue(), max(repeat // 5, 1))),
+                }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='开抢关键路径的微基准')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    select_parser = subparsers.add_parser('select', help='选择策略在大型场馆快照上的耗时')
+    select_parser.add_argument('--fields', default='50,500,5000', help='逗号分隔的场地数量')
+    select_parser.add_argument('--repeat', type=int, default=200, help='每组重复次数')
+    select_parser.add_argument('--free-ratio', type=float, default=0.3, help='可预订时段的比例')
+    decode_parser = subparsers.add_parser('decode', help='场馆状态响应在大型场馆上的解码耗时')
+    decode_parser.add_argument('--fields', default='50,500,1500', help='逗号分隔的每个时段场地数量')
+    decode_parser.add_argument('--payload', action='append', default=[], help='保存下来的原始响应，可重复指定')
+    decode_parser.add_argument('--repeat', type=int, default=50, help='每组重复次数')
+    decode_parser.add_argument('--free-ratio', type=float, default=0.3, help='可预订时段的比例')
+    args = parser.parse_args()
+
+    result = {
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "command": args.command,
+    }
+    if args.command == 'select':
+        field_counts = [int(value) for value in args.fields.split(',') if value.strip()]
+        result["results"] = bench_select(field_counts, repeat=args.repeat, free_ratio=args.free_ratio)
+    elif args.command == 'decode':
+        payloads = {f"synthetic-{fields}": synthetic_payload(fields, free_ratio=args.free_ratio)
+                    for fields in (int(value) for value in args.fields.split(',') if value.strip())}
+        for path in args.payload:
+            with open(path, 'rb') as f:
+                payloads[path] = f.read()
+        result["decode_backend"] = decode.BACKEND
+        result["results"] = bench_decode(payloads, repeat=args.repeat)
+
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""本地模拟的场馆服务器，用于离线测试与性能评估
+
+实现 /Field/GetVenueStateNew 与 /Field/OrderField 两个接口，返回与线上相同的 JSON 结构
+（errorcode、message 以及 JSON 字符串形式的 resultdata），可配置延迟、错误率、场地目录与开放预订时刻。
+
+    python -m vfmc.mock_server --port 8000 --latency 0.02 --release-in 10
+"""
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass
+from email.utils import formatdate
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+logger = logging.getLogger(__name__)
+
+# 各时段包含的整点开始时间：0表示上午 1表示下午 2表示晚上
+PERIOD_HOURS = {0: range(8, 12), 1: range(12, 18), 2: range(18, 22)}
+
+FREE = "0"  # 可预订
+BOOKED = "1"  # 已被预订
+NOT_RELEASED = "2"  # 尚未开放（模拟服务器自定义的状态）
+
+
+@dataclass
+class MockServerConfig:
+    """模拟服务器配置类
+    """
+    host: str = '127.0.0.1'
+    port: int = 0  # 0 表示自动分配端口
+    latency: float = 0.0  # 每个请求的固定处理延迟（秒）
+    jitter: float = 0.0  # 在固定延迟之上追加 [0, jitter) 的随机延迟
+    error_rate: float = 0.0  # 返回业务错误（errorcode 非 0）的概率
+    http_error_rate: float = 0.0  # 返回 HTTP 500 的概率
+    release_at: Optional[float] = None  # 开放预订的时刻（time.time() 时间戳），None 表示一直开放
+    clock_skew: float = 0.0  # Date 头相对本机时间的偏差（秒）
+    fields: int = 12  # 每个时段的场地数量
+    booked_ratio: float = 0.0  # 开放时已被他人预订的比例
+    inventory: Optional[List[Dict]] = None  # 自定义场地目录，需包含 TimePeriod 字段；为空时按 fields 生成
+    require_cookie: bool = False  # 为 True 时缺少 JWTUserToken 的请求返回未登录
+    partial_orders: bool = False  # 为 True 时一次下单多个场地可以部分成功，成功的场地放在 resultdata 中返回
+    seed: Optional[int] = None
+
+
+def build_inventory(field_type_no: str = '017', fields: int = 12) -> List[Dict]:
+    """生成默认的场地目录：每个时段每个场地每小时一条
+    """
+    inventory = []
+    for time_period, hours in PERIOD_HOURS.items():
+        for hour in hours:
+            for number in range(1, fields + 1):
+                inventory.append({
+                    "TimePeriod": time_period,
+                    "FieldNo": f"YMQ{number:03d}",
+                    "FieldTypeNo": field_type_no,
+                    "FieldName": f"羽毛球{number}号场",
+                    "BeginTime": f"{hour:02d}:00",
+                    "EndTime": f"{hour + 1:02d}:00",
+                    "FinalPrice": "20.00",
+                })
+    return inventory
+
+
+class MockVenueState:
+    """场地目录与预订状态，所有方法都是线程安全的
+    """
+
+    def __init__(self, config: MockServerConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.inventory = config.inventory if config.inventory is not None else build_inventory(fields=config.fields)
+        self.catalogue = {(row["FieldNo"], row["BeginTime"]): row for row in self.inventory}
+        self.booked = set()  # (dateadd, FieldNo, BeginTime)
+        self.orders = []  # 成功的订单记录
+        self.counters = {"state": 0, "order": 0, "order_ok": 0, "order_rejected": 0, "errors": 0}
+        self.lock = threading.Lock()
+
+        for row in self.inventory:
+            if self.random.random() < config.booked_ratio:
+                self.booked.add((None, row["FieldNo"], row["BeginTime"]))
+
+    def released(self) -> bool:
+        return self.config.release_at is None or time.time() >= self.config.release_at
+
+    def _is_booked(self, dateadd: int, key: Tuple[str, str]) -> bool:
+        return (dateadd, *key) in self.booked or (None, *key) in self.booked
+
+    def venue_state(self, dateadd: int, time_period: int) -> List[Dict]:
+        """返回指定时段的场地列表，带 FieldState
+        """
+        released = self.released()
+        with self.lock:
+            self.counters["state"] += 1
+            rows = []
+            for row in self.inventory:
+                if row["TimePeriod"] != time_period:
+                    continue
+                item = {key: value for key, value in row.items() if key != "TimePeriod"}
+                if not released:
+                    item["FieldState"] = NOT_RELEASED
+                elif self._is_booked(dateadd, (row["FieldNo"], row["BeginTime"])):
+                    item["FieldState"] = BOOKED
+                else:
+                    item["FieldState"] = FREE
+                rows.append(item)
+            return rows
+
+    def order(self, checkdata: List[Dict], user: str) -> Tuple[int, str, List[Dict]]:
+        """下单，返回 (errorcode, message, 预订成功的场地)
+
+        默认所有场地都可预订时才整体成功；partial_orders 为 True 时预订其中可预订的部分，
+        有场地失败时 message 说明失败原因。
+        """
+        with self.lock:
+            self.counters["order"] += 1
+            if not self.released():
+                self.counters["order_rejected"] += 1
+                return 1, "未到预订时间", []
+
+            keys = []
+            booked = []
+            errors = []
+            for item in checkdata:
+                key = (item.get("FieldNo"), item.get("BeginTime"))
+                if key not in self.catalogue:
+                    errors.append((key, "场地不存在"))
+                    continue
+                dateadd = int(item.get("DateAdd", 0))
+                if self._is_booked(dateadd, key) or (dateadd, *key) in keys:
+                    errors.append((key, "该场地已被预订"))
+                    continue
+                keys.append((dateadd, *key))
+                booked.append({"FieldNo": key[0], "BeginTime": key[1]})
+
+            if not keys or (errors and not self.config.partial_orders):
+                self.counters["order_rejected"] += 1
+                return 1, errors[0][1] if errors else "参数错误", []
+
+            self.booked.update(keys)
+            self.orders.append({"user": user, "time": time.time(), "slots": keys})
+            self.counters["order_ok"] += 1
+            return 0, "；".join(f"{field_no} {begin_time} {reason}" for (field_no, begin_time), reason in errors), booked
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # 支持长连接，与线上服务器的 keep-alive 行为一致
+    disable_nagle_algorithm = True  # 响应头与响应体分两次写出，关闭 Nagle 算法避免额外的 40 毫秒延迟
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def date_time_string(self, timestamp=None):
+        return formatdate((timestamp or time.time()) + self.server.config.clock_skew, usegmt=True)
+
+    def _send_json(self, payload: Dict, status: int = 200):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _cookies(self) -> Dict[str, str]:
+        cookies = {}
+        for part in self.headers.get('Cookie', '').split(';'):
+            if '=' in part:
+                key, value = part.strip().split('=', 1)
+                cookies[key] = value
+        return cookies
+
+    def _simulate(self) -> bool:
+        """模拟延迟与随机错误，返回 False 表示已经发送了错误响应
+        """
+        config = self.server.config
+        state = self.server.state
+        delay = config.latency + (state.random.uniform(0, config.jitter) if config.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        if config.http_error_rate and state.random.random() < config.http_error_rate:
+            with state.lock:
+                state.counters["errors"] += 1
+            self._send_json({"errorcode": 500, "message": "Internal Server Error"}, status=500)
+            return False
+
+        if config.error_rate and state.random.random() < config.error_rate:
+            with state.lock:
+                state.counters["errors"] += 1
+            self._send_json({"errorcode": 1, "message": "系统繁忙，请稍后再试", "resultdata": ""})
+            return False
+
+        if config.require_cookie and not self._cookies().get('JWTUserToken'):
+            self._send_json({"errorcode": -1, "message": "请先登录", "resultdata": ""})
+            return False
+
+        return True
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != '/Field/GetVenueStateNew':
+            self._send_json({"errorcode": 404, "message": "Not Found"}, status=404)
+            return
+        if not self._simulate():
+            return
+
+        query = parse_qs(url.query)
+        rows = self.server.state.venue_state(int(query.get('dateadd', ['0'])[0]),
+                                             int(query.get('TimePeriod', ['0'])[0]))
+        self._send_json({"errorcode": 0, "message": "", "resultdata": json.dumps(rows, ensure_ascii=False)})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+        if url.path != '/Field/OrderField':
+            self._send_json({"errorcode": 404, "message": "Not Found"}, status=404)
+            return
+        if not self._simulate():
+            return
+
+        try:
+            checkdata = json.loads(parse_qs(body)['checkdata'][0])
+        except (KeyError, IndexError, ValueError):
+            self._send_json({"errorcode": 1, "message": "参数错误", "resultdata": ""})
+            return
+
+        errorcode, message, booked = self.server.state.order(checkdata, self._cookies().get('UserId', ''))
+        resultdata = json.dumps(booked, ensure_ascii=False) if message and booked else ""
+        self._send_json({"errorcode": errorcode, "message": message, "resultdata": resultdata})
+
+
+class MockVfmcServer:
+    """在后台线程中运行的模拟服务器，可用作上下文管理器
+
+        with MockVfmcServer(MockServerConfig(latency=0.01)) as server:
+            booking_system = VenueBookingSystem(config, base_url=server.base_url)
+    """
+
+    def __init__(self, config: Optional[MockServerConfig] = None):
+        self.config = config or MockServerConfig()
+        self.state = MockVenueState(self.config)
+        self.httpd = ThreadingHTTPServer((self.config.host, self.config.port), MockRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = self.config
+        self.httpd.state = self.state
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def reset(self, release_at: Optional[float] = None):
+        """清空预订状态并重新设置开放时刻，便于同一个服务器重复使用
+        """
+        self.config.release_at = release_at
+        self.state = MockVenueState(self.config)
+        self.httpd.state = self.state
+
+    def start(self) -> 'MockVfmcServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='mock-vfmc', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self) -> 'MockVfmcServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地模拟的场馆服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的固定延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='随机附加延迟上限（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='业务错误概率')
+    parser.add_argument('--http-error-rate', type=float, default=0.0, help='HTTP 500 概率')
+    parser.add_argument('--release-in', type=float, default=None, help='多少秒后开放预订，默认一直开放')
+    parser.add_argument('--clock-skew', type=float, default=0.0, help='Date 头偏差（秒）')
+    parser.add_argument('--fields', type=int, default=12, help='每个时段的场地数量')
+    parser.add_argument('--booked-ratio', type=float, default=0.0, help='开放时已被预订的比例')
+    parser.add_argument('--inventory', default=None, help='自定义场地目录的 JSON 文件')
+    parser.add_argument('--catalogue-db', default=None, help='使用本地缓存的场地目录（CatalogueStore 的 SQLite 文件）')
+    parser.add_argument('--require-cookie', action='store_true', help='校验 JWTUserToken')
+    parser.add_argument('--partial-orders', action='store_true', help='一次下单多个场地时允许部分成功')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    inventory = None
+    if args.inventory:
+        with open(args.inventory, encoding='utf-8') as f:
+            inventory = json.load(f)
+    elif args.catalogue_db:
+        from .catalogue import CatalogueStore
+        inventory = CatalogueStore(args.catalogue_db).inventory() or None
+
+    config = MockServerConfig(
+        host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, http_error_rate=args.http_error_rate,
+        release_at=time.time() + args.release_in if args.release_in is not None else None,
+        clock_skew=args.clock_skew, fields=args.fields, booked_ratio=args.booked_ratio,
+        inventory=inventory, require_cookie=args.require_cookie, partial_orders=args.partial_orders,
+        seed=args.seed,
+    )
+
+    from .logs import init_logging
+    init_logging()
+    server = MockVfmcServer(config)
+    logger.info(f"[main] 模拟服务器已启动: {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        logger.info(f"[main] 请求统计: {server.state.counters}")
+
+
+if __name__ == "__main__":
+    main()
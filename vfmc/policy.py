@@ -0,0 +1,182 @@
+from dataclasses import dataclass
+from typing import Container, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .slots import Slot, SlotIndex, to_minutes
+
+
+@dataclass(frozen=True)
+class Preference:
+    """一条偏好规则，所有条件同时满足的场地才算匹配
+
+    earliest/latest 限定开始时间的范围（"HH:MM"，两端都包含）；fields 限定场地编号或场地名称，
+    排在前面的场地优先；max_price 是每个时段的价格上限；consecutive 要求同一场地从该时段起
+    连续有若干个可预订的时段，例如 2 表示同一场地连续两小时。
+    """
+    earliest: Optional[str] = None
+    latest: Optional[str] = None
+    fields: Tuple[str, ...] = ()
+    max_price: Optional[float] = None
+    consecutive: int = 1
+
+    def __post_init__(self):
+        if self.consecutive < 1:
+            raise ValueError(f"consecutive 必须为正整数，当前为 {self.consecutive}")
+        # 冻结的 dataclass 只能通过 object.__setattr__ 预先计算匹配时使用的值
+        object.__setattr__(self, 'fields', tuple(self.fields))
+        object.__setattr__(self, '_earliest', to_minutes(self.earliest) if self.earliest else None)
+        object.__setattr__(self, '_latest', to_minutes(self.latest) if self.latest else None)
+        object.__setattr__(self, '_field_order', {field: order for order, field in enumerate(self.fields)})
+
+    @classmethod
+    def parse(cls, spec: str, **kwargs) -> 'Preference':
+        """由时间写法生成偏好："16:00" 表示准点开始，"16:00-18:00" 表示开始时间范围，
+        "16" 这样的前缀与原先 preferred_time 的前缀匹配相同
+        """
+        spec = spec.strip()
+        if '-' in spec:
+            earliest, _, latest = spec.partition('-')
+            return cls(earliest=earliest.strip(), latest=latest.strip(), **kwargs)
+        if len(spec) == 5 and spec[2] == ':':
+            return cls(earliest=spec, latest=spec, **kwargs)
+        if len(spec) == 4 and spec[2] == ':':
+            return cls(earliest=f"{spec}0", latest=f"{spec}9", **kwargs)
+        return cls(earliest=f"{spec}:00", latest=f"{spec}:59", **kwargs)
+
+    def field_order(self, slot: Slot) -> Optional[int]:
+        """场地在 fields 中的位置，未限定场地时为 0，不符合时为 None
+        """
+        if not self.fields:
+            return 0
+        order = self._field_order.get(slot.field_no)
+        if order is None:
+            order = self._field_order.get(slot.field_name)
+        return order
+
+    def candidates(self, index: SlotIndex) -> Iterator[Slot]:
+        """开始时间落在范围内的时段，通过按开始时间建立的索引查找
+        """
+        for begin, slots in index.by_begin.items():
+            if self._earliest is not None and begin < self._earliest:
+                continue
+            if self._latest is not None and begin > self._latest:
+                continue
+            yield from slots
+
+    def chain(self, slot: Slot, index: SlotIndex, exclude: Container = ()) -> Optional[Tuple[Slot, ...]]:
+        """以 slot 开头、满足本偏好的连续时段，不满足时返回 None；后续时段在 exclude 中时同样不满足
+        """
+        if self._earliest is not None and slot.begin < self._earliest:
+            return None
+        if self._latest is not None and slot.begin > self._latest:
+            return None
+        if self.max_price is not None and float(slot.price) > self.max_price:
+            return None
+        chain = (slot,)
+        while len(chain) < self.consecutive:
+            following = index.following(chain[-1])
+            if following is None or (self.max_price is not None and float(following.price) > self.max_price):
+                return None
+            if exclude and (following.field_no, following.begin) in exclude:
+                return None
+            chain += (following,)
+        return chain
+
+
+class SelectionPolicy:
+    """按优先级排列的偏好规则，从一次查询的结果中选出最好的场地时段
+
+    按优先级依次检查偏好，每条偏好只通过开始时间索引遍历时间范围内的时段，第一条有匹配的偏好
+    即决定结果。同一偏好内依次比较场地在 fields 中的位置、开始时间和场地编号，
+    因此同样的查询结果总是选出同样的场地。
+    fallback 为 True 时，所有偏好都不满足的情况下仍然选择最早开始的任意场地。
+    """
+
+    def __init__(self, preferences: Iterable[Preference] = (), fallback: bool = True):
+        self.preferences = list(preferences)
+        self.fallback = fallback
+
+    @classmethod
+    def from_preferred_time(cls, preferred_time: Union[str, Sequence[str], None],
+                            fallback: bool = True) -> 'SelectionPolicy':
+        """兼容原先的 preferred_time 写法：一个或按优先级排列的多个时间
+        """
+        if not preferred_time:
+            return cls(fallback=fallback)
+        if isinstance(preferred_time, str):
+            preferred_time = [preferred_time]
+        return cls([Preference.parse(spec) for spec in preferred_time], fallback=fallback)
+
+    def select(self, index: SlotIndex, exclude: Container = ()) -> Optional[Tuple[Slot, ...]]:
+        """选出排名最高的场地时段（连续时段的规则返回多个时段），没有符合条件的场地时返回 None
+
+        exclude 中是不能选择的 (场地编号, 开始分钟数)，例如其他任务已经认领的时段。
+        """
+        for rank, preference in enumerate(self.preferences):
+            best = None
+            best_key = None
+            for slot in preference.candidates(index):
+                if exclude and (slot.field_no, slot.begin) in exclude:
+                    continue
+                order = preference.field_order(slot)
+                if order is None:
+                    continue
+                key = (order, slot.begin, slot.field_no)
+                if best_key is not None and key >= best_key:
+                    continue
+                chain = preference.chain(slot, index, exclude)
+                if chain is not None:
+                    best, best_key = chain, key
+            if best is not None:
+                return best
+        if self.fallback:
+            for begin in sorted(index.by_begin):
+                slots = [slot for slot in index.by_begin[begin]
+                         if not exclude or (slot.field_no, slot.begin) not in exclude]
+                if slots:
+                    return (min(slots, key=lambda slot: slot.field_no),)
+        return None
+
+    def rank(self, index: SlotIndex) -> List[Tuple[Slot, ...]]:
+        """按同样的规则给出所有候选并排序，用于调试和与 select 的结果对照
+        """
+        candidates = []
+        for slot in index.slots:
+            for rank, preference in enumerate(self.preferences):
+                order = preference.field_order(slot)
+                chain = preference.chain(slot, index) if order is not None else None
+                if chain is not None:
+                    candidates.append(((rank, order, slot.begin, slot.field_no), chain))
+                    break
+            else:
+                if self.fallback:
+                    candidates.append(((len(self.preferences), 0, slot.begin, slot.field_no), (slot,)))
+        candidates.sort(key=lambda candidate: candidate[0])
+        return [chain for _, chain in candidates]
+
+    def __repr__(self) -> str:
+        return f"SelectionPolicy({self.preferences!r}, fallback={self.fallback})"
+
+
+def missing_slots(slots: Sequence, booked: Sequence) -> List:
+    """slots 中开始时间没有出现在 booked 里的时段，即部分预订成功后仍然缺少的时段
+    """
+    booked_begins = {to_minutes(slot["BeginTime"]) for slot in booked}
+    return [slot for slot in slots if to_minutes(slot["BeginTime"]) not in booked_begins]
+
+
+def replacement_policy(missing: Sequence) -> SelectionPolicy:
+    """为部分预订成功后仍然缺少的时段生成选择策略
+
+    从最早缺少的时段起取连续缺少的几个小时，优先选择原来的场地，其次任意场地的同一时间；不再退而选择其他时间。
+    """
+    missing = sorted(missing, key=lambda slot: to_minutes(slot["BeginTime"]))
+    run = [missing[0]]
+    for slot in missing[1:]:
+        if to_minutes(slot["BeginTime"]) != to_minutes(run[-1]["EndTime"]):
+            break
+        run.append(slot)
+    begin_time = run[0]["BeginTime"]
+    return SelectionPolicy([
+        Preference(earliest=begin_time, latest=begin_time, fields=(run[0]["FieldNo"],), consecutive=len(run)),
+        Preference(earliest=begin_time, latest=begin_time, consecutive=len(run)),
+    ], fallback=False)
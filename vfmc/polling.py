@@ -0,0 +1,62 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class PollConfig:
+    """轮询节奏与请求预算
+
+    开抢后 window 秒内以 interval 紧密轮询；之后每次间隔乘以 backoff，直到 max_interval。
+    查询与下单请求合计不超过 max_requests 个。
+    """
+    interval: float = 0.25  # 窗口内的轮询间隔（秒）
+    window: float = 5.0  # 开抢后紧密轮询的时长（秒）
+    backoff: float = 2.0  # 窗口外每次间隔增加的倍数
+    max_interval: float = 2.0  # 窗口外的最大间隔（秒）
+    max_requests: int = 100  # 单个任务的请求总数上限
+
+
+class PollScheduler:
+    """单个任务的轮询调度器：决定下一次请求前等待多久，并记录已使用的请求数
+
+    不负责休眠，线程与协程两种运行方式都用它计算间隔，再各自调用 time.sleep 或 asyncio.sleep。
+    release 为开抢时刻的 time.perf_counter 值，未传入时以创建调度器的时刻作为开抢时刻。
+    """
+
+    def __init__(self, config: Optional[PollConfig] = None, release: Optional[float] = None,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.config = config or PollConfig()
+        self.clock = clock
+        self.release = clock() if release is None else release
+        self.requests = 0
+        self.delay = self.config.interval
+
+    @property
+    def remaining(self) -> int:
+        return max(self.config.max_requests - self.requests, 0)
+
+    def take(self) -> bool:
+        """占用一个请求名额，预算用完时返回 False
+        """
+        if self.requests >= self.config.max_requests:
+            return False
+        self.requests += 1
+        return True
+
+    def in_window(self, now: Optional[float] = None) -> bool:
+        since = (self.clock() if now is None else now) - self.release
+        return since <= self.config.window
+
+    def next_delay(self, now: Optional[float] = None) -> float:
+        """下一次请求前应等待的秒数
+        """
+        config = self.config
+        now = self.clock() if now is None else now
+        since = now - self.release
+        if since <= config.window:
+            self.delay = config.interval
+            return config.interval
+        # 窗口之后：指数退避
+        self.delay = min(self.delay * config.backoff, config.max_interval)
+        return self.delay
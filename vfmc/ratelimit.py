@@ -0,0 +1,225 @@
+"""同一进程中全部预订任务共享的客户端限流
+
+每个接口（查询场馆状态 state、下单 order）一个令牌桶，每秒补充 rate 个令牌，最多积攒 burst 个。
+开抢前和退避阶段请求稀疏，令牌会积攒到 burst，开抢后第一秒的密集请求可以直接用掉；持续超过 rate 时请求排队等待。
+查询与下单分开计数，轮询再密集也不会让下单请求排队。
+
+桶中没有令牌时请求进入等待队列，每产生一个令牌就交给等待中的任务里最久没有得到令牌的一个，令牌不足时各任务轮流得到令牌，
+请求更频繁的任务不会挤占其他任务。分配只在锁内计算，等待由调用方完成（线程用 time.sleep，协程用 asyncio.sleep）：
+等待中的请求在下一个令牌产生时醒来，分配令牌并检查是否轮到自己，因此线程与协程两种运行方式可以共用同一个限流器。
+"""
+import time
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+ENDPOINTS = ('state', 'order')
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """单个接口的令牌桶参数
+    """
+    rate: float = 10.0  # 每秒补充的令牌数，即持续的请求速率上限
+    burst: int = 20  # 最多积攒的令牌数，即短时间内可以连续发出的请求数
+
+
+@dataclass(frozen=True)
+class RateLimitConfig:
+    """各接口的限流参数，enabled 为 False 时不限流
+    """
+    enabled: bool = True
+    state: RateLimit = RateLimit()  # 查询场馆状态
+    order: RateLimit = RateLimit(rate=10.0, burst=10)  # 下单
+
+
+class TokenBucket:
+    """令牌桶
+    """
+
+    def __init__(self, limit: RateLimit, clock: Callable[[], float] = time.perf_counter):
+        self.rate = limit.rate
+        self.burst = limit.burst
+        self.clock = clock
+        self.tokens = float(limit.burst)
+        self.updated = clock()
+
+    def refill(self, now: Optional[float] = None):
+        now = self.clock() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> bool:
+        """有令牌时取出一个并返回 True
+        """
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def delay(self) -> float:
+        """距离下一个令牌产生还有多少秒
+        """
+        return max(1 - self.tokens, 0.0) / self.rate
+
+    def refund(self):
+        """归还一个取出了但没有使用的令牌
+        """
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class _Waiter:
+    """等待令牌的一个请求
+    """
+    __slots__ = ('job', 'granted')
+
+    def __init__(self, job: str):
+        self.job = job
+        self.granted = False
+
+
+class WaitStats:
+    """某个任务在某个接口上的等待统计
+    """
+    __slots__ = ('requests', 'delayed', 'total', 'longest')
+
+    def __init__(self):
+        self.requests = 0
+        self.delayed = 0  # 需要等待的请求数
+        self.total = 0.0  # 等待的总秒数
+        self.longest = 0.0
+
+    def add(self, wait: float):
+        self.requests += 1
+        if wait > 0:
+            self.delayed += 1
+            self.total += wait
+            self.longest = max(self.longest, wait)
+
+    def merge(self, other: 'WaitStats'):
+        self.requests += other.requests
+        self.delayed += other.delayed
+        self.total += other.total
+        self.longest = max(self.longest, other.longest)
+
+    def to_dict(self) -> Dict:
+        return {"requests": self.requests, "delayed": self.delayed, "wait_ms": round(self.total * 1000, 1),
+                "max_ms": round(self.longest * 1000, 1)}
+
+
+class RateLimiter:
+    """全部任务共享的限流器，可以同时被多个线程和协程使用
+
+    acquire 与 acquire_async 在需要时等待，返回等待的秒数；每个任务在每个接口上等待了多久见 summary。
+    令牌不足时按任务轮转分配：等待中的任务里，最久没有在该接口上得到令牌的任务先得到下一个令牌。
+    """
+
+    def __init__(self, config: Optional[RateLimitConfig] = None, clock: Callable[[], float] = time.perf_counter):
+        self.config = config or RateLimitConfig()
+        self.clock = clock
+        self.buckets = {endpoint: TokenBucket(getattr(self.config, endpoint), clock) for endpoint in ENDPOINTS}
+        self.waiting: Dict[str, List[_Waiter]] = {endpoint: [] for endpoint in ENDPOINTS}
+        self.served: Dict[str, Dict[str, int]] = {endpoint: {} for endpoint in ENDPOINTS}  # 任务最近一次得到令牌的序号
+        self.turns = 0
+        self.stats: Dict[Tuple[str, str], WaitStats] = {}
+        self.lock = threading.Lock()
+
+    def _grant(self, endpoint: str):
+        """把已经产生的令牌依次交给等待中最久没有得到令牌的任务，同一任务的请求按到达顺序，调用时需持有锁
+        """
+        bucket = self.buckets[endpoint]
+        waiting = self.waiting[endpoint]
+        served = self.served[endpoint]
+        bucket.refill()
+        while waiting and bucket.take():
+            waiter = min(waiting, key=lambda w: served.get(w.job, -1))
+            waiting.remove(waiter)
+            waiter.granted = True
+            self.turns += 1
+            served[waiter.job] = self.turns
+
+    def _enqueue(self, endpoint: str, job: str) -> _Waiter:
+        waiter = _Waiter(job)
+        with self.lock:
+            self.waiting[endpoint].append(waiter)
+        return waiter
+
+    def _poll(self, endpoint: str, waiter: _Waiter) -> float:
+        """分配令牌，已经轮到 waiter 时返回 0，否则返回距离下一个令牌产生的秒数
+        """
+        with self.lock:
+            self._grant(endpoint)
+            return 0.0 if waiter.granted else self.buckets[endpoint].delay()
+
+    def _abandon(self, endpoint: str, waiter: _Waiter):
+        """请求不再等待：退出等待队列，已经分到的令牌归还给其他任务
+        """
+        with self.lock:
+            if waiter.granted:
+                self.buckets[endpoint].refund()
+            else:
+                self.waiting[endpoint].remove(waiter)
+
+    def _record(self, endpoint: str, job: str, wait: float) -> float:
+        with self.lock:
+            stats = self.stats.get((endpoint, job))
+            if stats is None:
+                stats = self.stats[(endpoint, job)] = WaitStats()
+            stats.add(wait)
+        return wait
+
+    def acquire(self, endpoint: str, job: str) -> float:
+        waiter = self._enqueue(endpoint, job)
+        delay = self._poll(endpoint, waiter)
+        if delay <= 0:
+            return self._record(endpoint, job, 0.0)
+        started = self.clock()
+        try:
+            while delay > 0:
+                time.sleep(delay)
+                delay = self._poll(endpoint, waiter)
+        except BaseException:
+            # 例如主线程中的 KeyboardInterrupt
+            self._abandon(endpoint, waiter)
+            raise
+        return self._record(endpoint, job, self.clock() - started)
+
+    async def acquire_async(self, endpoint: str, job: str) -> float:
+        waiter = self._enqueue(endpoint, job)
+        delay = self._poll(endpoint, waiter)
+        if delay <= 0:
+            return self._record(endpoint, job, 0.0)
+        started = self.clock()
+        try:
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self._poll(endpoint, waiter)
+        except asyncio.CancelledError:
+            self._abandon(endpoint, waiter)
+            raise
+        return self._record(endpoint, job, self.clock() - started)
+
+    def summary(self) -> Dict[str, Dict]:
+        """按接口汇总的请求数与等待时间，jobs 中是每个任务的明细
+        """
+        with self.lock:
+            items = list(self.stats.items())
+        result = {}
+        for endpoint in ENDPOINTS:
+            total = WaitStats()
+            jobs = {}
+            for (name, job), stats in items:
+                if name == endpoint:
+                    total.merge(stats)
+                    jobs[job] = stats.to_dict()
+            result[endpoint] = {**total.to_dict(), "jobs": jobs}
+        return result
+
+    def describe(self) -> str:
+        parts = []
+        for endpoint, stats in self.summary().items():
+            if stats["requests"]:
+                parts.append(f"{endpoint} {stats['requests']} 个请求，{stats['delayed']} 个等待，"
+                             f"共等待 {stats['wait_ms']:.0f}ms，最长 {stats['max_ms']:.0f}ms")
+        return "；".join(parts) or "没有请求"
@@ -0,0 +1,119 @@
+import time
+from typing import Callable, Optional, Sequence, Tuple
+
+from .jobs import TimingBudget
+from .polling import PollScheduler
+
+MIN_REQUEST_TIMEOUT = 0.5  # 距离截止时间不足该值时不再发出新的请求（秒）
+
+# 接口返回这些错误时重试没有意义，立即结束任务
+TERMINAL_STATUS = {401: "not_logged_in", 403: "not_logged_in"}
+TERMINAL_ERRORCODES = {-1: "not_logged_in"}
+TERMINAL_MESSAGES = (
+    ("登录", "not_logged_in"),
+    ("已预订过", "already_booked"),
+    ("已有预订", "already_booked"),
+    ("重复预订", "already_booked"),
+    ("预订次数", "already_booked"),
+    ("预约次数", "already_booked"),
+)
+
+STOP_REASONS = {
+    "max_attempts": "达到最大尝试次数",
+    "deadline": "超过截止时间",
+    "budget": "请求预算已用完",
+    "not_logged_in": "未登录或 Cookie 已失效",
+    "already_booked": "该账号已有预订",
+}
+
+
+def classify_reply(status: Optional[int], errorcode=None, message: Optional[str] = None,
+                   terminal_messages: Sequence[Tuple[str, str]] = TERMINAL_MESSAGES) -> Optional[str]:
+    """判断接口返回的错误是否为终止错误，是时返回原因，可以重试时返回 None
+    """
+    if status in TERMINAL_STATUS:
+        return TERMINAL_STATUS[status]
+    if errorcode in TERMINAL_ERRORCODES:
+        return TERMINAL_ERRORCODES[errorcode]
+    if errorcode not in (0, None) and message:
+        for keyword, reason in terminal_messages:
+            if keyword in message:
+                return reason
+    return None
+
+
+class RetryPolicy:
+    """单个任务的重试策略
+
+    开抢时刻 release（time.perf_counter 的值，默认为创建时刻）之后 timing.deadline 秒为硬截止时间，
+    单次请求的超时取 timing.request_timeout 与剩余时间中较小的一个；两次尝试之间的间隔与请求预算由 PollScheduler 决定。
+    接口返回的错误分为可重试与终止两类，终止错误（未登录、已有预订）出现后不再消耗剩余的尝试次数。
+    """
+
+    def __init__(self, timing: Optional[TimingBudget] = None, release: Optional[float] = None,
+                 clock: Callable[[], float] = time.perf_counter,
+                 terminal_messages: Sequence[Tuple[str, str]] = TERMINAL_MESSAGES):
+        self.timing = timing or TimingBudget()
+        self.clock = clock
+        self.poller = PollScheduler(self.timing.poll, release, clock)
+        self.deadline = self.poller.release + self.timing.deadline
+        self.terminal_messages = terminal_messages
+        self.reason = None  # 停止重试的原因，见 STOP_REASONS
+
+    @property
+    def max_attempts(self) -> int:
+        return self.timing.max_attempts
+
+    def remaining(self) -> float:
+        """距离截止时间的秒数
+        """
+        return self.deadline - self.clock()
+
+    def stop(self, reason: str) -> bool:
+        if self.reason is None:
+            self.reason = reason
+        return False
+
+    def take(self) -> bool:
+        """准备发出一个请求：没有超过截止时间且还有请求预算时占用一个名额并返回 True
+        """
+        if self.reason is not None:
+            return False
+        if self.remaining() < MIN_REQUEST_TIMEOUT:
+            return self.stop("deadline")
+        if not self.poller.take():
+            return self.stop("budget")
+        return True
+
+    def timeout(self) -> float:
+        """本次请求的超时时间，不会越过截止时间
+        """
+        return max(min(self.timing.request_timeout, self.remaining()), MIN_REQUEST_TIMEOUT)
+
+    def next_delay(self) -> Optional[float]:
+        """下一次尝试前应等待的秒数，等待后已来不及再发请求时返回 None
+        """
+        delay = self.poller.next_delay()
+        if self.reason is not None:
+            return None
+        if self.remaining() - delay < MIN_REQUEST_TIMEOUT:
+            self.stop("deadline")
+            return None
+        return delay
+
+    def classify(self, status: Optional[int], errorcode=None, message: Optional[str] = None) -> Optional[str]:
+        """判断接口返回的错误是否为终止错误，见 classify_reply
+        """
+        return classify_reply(status, errorcode, message, self.terminal_messages)
+
+    def check(self, reply: Optional[Tuple]) -> bool:
+        """检查最近一次请求的 (HTTP 状态码, errorcode, message)，遇到终止错误时记录原因并返回 True
+        """
+        reason = self.classify(*reply) if reply else None
+        if reason is None:
+            return False
+        self.stop(reason)
+        return True
+
+    def describe(self) -> str:
+        return STOP_REASONS.get(self.reason, self.reason or "")
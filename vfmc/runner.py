@@ -0,0 +1,105 @@
+import time
+import logging
+import threading
+from typing import List, Optional, Sequence
+
+from .attempts import FETCH, SLEEP, booking_steps
+from .catalogue import CatalogueStore
+from .client import VenueBookingSystem, BASE_URL
+from .clock import ClockSync
+from .coordination import SlotCoordinator
+from .events import EventLog
+from .jobs import BookingJob
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .scheduler import ScheduleConfig, ReleaseScheduler
+from .trace import Tracer
+
+logger = logging.getLogger(__name__)
+
+
+def wait_until_target_time(booking_systems: Optional[List[VenueBookingSystem]] = None,
+                           schedule: Optional[ScheduleConfig] = None):
+    """等待直到服务器时间到达目标时间，若传入预订系统实例则在开抢前几秒预热连接
+    """
+    def warm_up():
+        for booking_system in booking_systems:
+            booking_system.warm_up()
+
+    def sync_clock():
+        if not booking_systems:
+            return ClockSync().estimate()
+        return ClockSync(booking_systems[0].session, booking_systems[0].state_endpoint).estimate()
+
+    scheduler = ReleaseScheduler(schedule or ScheduleConfig())
+    scheduler.wait(on_warm_up=warm_up if booking_systems else None, on_sync=sync_clock)
+
+
+def book_field_thread(booking_system: VenueBookingSystem, job: BookingJob, release: Optional[float] = None) -> bool:
+    """单个预订任务，返回是否预订成功，流程见 attempts.booking_steps
+
+    release 为开抢时刻（time.perf_counter 的值，默认为调用时刻），签名与 aio.book_field_task 相同。
+    """
+    steps = booking_steps(booking_system, job, RetryPolicy(job.timing, release), "book_field_thread")
+    try:
+        step = next(steps)
+        while True:
+            try:
+                if step[0] == SLEEP:
+                    time.sleep(step[1])
+                    reply = None
+                elif step[0] == FETCH:
+                    reply = booking_system.get_available_fields(timeout=step[1])
+                else:
+                    reply = booking_system.book_fields(step[1], timeout=step[2])
+            except Exception as e:
+                step = steps.throw(e)
+            else:
+                step = steps.send(reply)
+    except StopIteration as done:
+        return done.value
+
+
+def run_jobs(jobs: Sequence[BookingJob], schedule: Optional[ScheduleConfig] = None, base_url: str = BASE_URL,
+             tracer: Optional[Tracer] = None, catalogue_store: Optional[CatalogueStore] = None,
+             events: Optional[EventLog] = None, limiter: Optional[RateLimiter] = None,
+             coordinator: Optional[SlotCoordinator] = None) -> int:
+    """每个预订任务一个线程，返回成功数量，参数与 aio.run_jobs 相同
+
+    未传入 schedule 时立即开始，否则先等待到开抢时间。预订系统实例在等待前创建，开抢时直接复用预热好的连接。
+    """
+    booking_systems = [VenueBookingSystem(job.config, base_url=base_url, tracer=tracer, job_id=job.name,
+                                          events=events, limiter=limiter, coordinator=coordinator)
+                       for job in jobs]
+    try:
+        if catalogue_store is not None:
+            for booking_system in booking_systems:
+                booking_system.learn_catalogue(catalogue_store.load(booking_system.config))
+
+        if schedule is not None:
+            # 等待直到目标时间，并在开抢前几秒预热连接
+            wait_until_target_time(booking_systems, schedule)
+        release = time.perf_counter()
+
+        results = [False] * len(jobs)
+
+        def worker(index: int):
+            results[index] = book_field_thread(booking_systems[index], jobs[index], release)
+
+        threads = [threading.Thread(target=worker, args=(index,), name=jobs[index].name)
+                   for index in range(len(jobs))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        if catalogue_store is not None:
+            # 只保存本次从接口看到的目录；只读取了缓存（推测下单成功或全部查询失败）时不刷新 last_seen
+            for booking_system in booking_systems:
+                if booking_system.observed:
+                    catalogue_store.save(booking_system.config, booking_system.catalogue)
+        return sum(results)
+
+    finally:
+        for booking_system in booking_systems:
+            booking_system.close()
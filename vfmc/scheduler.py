@@ -0,0 +1,123 @@
+import time
+import logging
+from typing import Callable, Optional
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from .clock import ClockOffset
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScheduleConfig:
+    """开抢时间配置类
+    """
+    hour: int = 21  # 21点
+    minute: int = 0  # 0分
+    second: int = 0  # 0秒
+    roll_over: bool = False  # 已经过了今天的目标时间时：True 等到明天同一时刻，False 立即开始
+    sync_seconds: float = 30  # 开抢前多少秒与服务器对时
+    warm_up_seconds: float = 5  # 开抢前多少秒执行连接预热
+    lock_seconds: float = 1.0  # 距离目标时间不足该值时改用单调时钟计时
+    spin_seconds: float = 0.002  # 最后这段时间忙等，保证唤醒误差在毫秒以内
+
+
+class ReleaseScheduler:
+    """高精度开抢调度器
+
+    远离目标时间时按墙上时钟粗粒度休眠，临近目标时间时换算成单调时钟的截止点，
+    先休眠到截止点前 spin_seconds，再忙等到截止点，避免 time.sleep 的唤醒误差。
+    目标时间以服务器时间为准：clock_offset 为服务器时间减本地时间，lead_seconds
+    为提前发出请求的时间（通常取往返时间的一半），使请求恰好在目标时刻到达服务器。
+    """
+
+    def __init__(self, config: Optional[ScheduleConfig] = None, clock_offset: float = 0.0,
+                 lead_seconds: float = 0.0):
+        self.config = config or ScheduleConfig()
+        self.clock_offset = clock_offset
+        self.lead_seconds = lead_seconds
+
+    def apply_offset(self, estimate: Optional[ClockOffset]):
+        """应用对时结果，按服务器时间并提前半个往返时间唤醒
+
+        偏差取估计区间的下界 offset - error：真实偏差落在区间内的任何位置，请求都不会早于开抢时刻到达服务器。
+        """
+        if estimate is not None:
+            self.clock_offset = estimate.offset - estimate.error
+            self.lead_seconds = estimate.rtt / 2
+
+    def now(self) -> datetime:
+        """估计的服务器当前时间，已扣除提前量
+        """
+        return datetime.now() + timedelta(seconds=self.clock_offset + self.lead_seconds)
+
+    def next_target(self, now: Optional[datetime] = None) -> Optional[datetime]:
+        """计算下一个目标时间，已过目标时间且不顺延时返回 None 表示立即开始
+        """
+        now = now or self.now()
+        target_time = now.replace(hour=self.config.hour, minute=self.config.minute, second=self.config.second,
+                                  microsecond=0)
+        if now >= target_time:
+            if not self.config.roll_over:
+                return None
+            target_time += timedelta(days=1)
+        return target_time
+
+    def wait(self, on_warm_up: Optional[Callable[[], None]] = None,
+             on_sync: Optional[Callable[[], Optional[ClockOffset]]] = None) -> float:
+        """等待直到目标时间，返回实际唤醒时刻相对目标时间的误差（秒，正数表示晚于目标）
+
+        on_sync 会在距离目标时间不足 sync_seconds 时调用一次，其返回的对时结果用于修正目标时间；
+        on_warm_up 会在距离目标时间不足 warm_up_seconds 时调用一次。
+        """
+        func_name = "wait"
+        target_time = self.next_target()
+        if target_time is None:
+            logger.info(f"[{func_name}] 已过今天的目标时间，立即开始执行预订")
+            return 0.0
+
+        synced = on_sync is None
+        warmed_up = on_warm_up is None
+
+        # 粗粒度阶段：按墙上时钟计算剩余时间，每次休眠不会越过锁定点
+        while True:
+            remaining = (target_time - self.now()).total_seconds()
+
+            if not synced and remaining <= self.config.sync_seconds:
+                self.apply_offset(on_sync())
+                synced = True
+                continue
+
+            if not warmed_up and remaining <= self.config.warm_up_seconds:
+                on_warm_up()
+                warmed_up = True
+                continue
+
+            if remaining <= self.config.lock_seconds:
+                break
+
+            if remaining > 60:
+                logger.info(f"[{func_name}] 等待中... 距离开始时间还有 {remaining / 3600:.2f} 小时")
+                step = 60
+            else:
+                logger.info(f"[{func_name}] 等待中... 距离开始时间还有 {remaining:.0f} 秒")
+                step = 1
+            if not synced:
+                step = min(step, remaining - self.config.sync_seconds)
+            elif not warmed_up:
+                step = min(step, remaining - self.config.warm_up_seconds)
+            time.sleep(max(min(step, remaining - self.config.lock_seconds), 0))
+
+        # 精确阶段：换算成单调时钟截止点，休眠后忙等
+        deadline = time.perf_counter() + (target_time - self.now()).total_seconds()
+        remaining = deadline - time.perf_counter()
+        if remaining > self.config.spin_seconds:
+            time.sleep(remaining - self.config.spin_seconds)
+        while time.perf_counter() < deadline:
+            pass
+
+        overshoot = time.perf_counter() - deadline
+        logger.info(
+            f"[{func_name}] 到达目标时间 {target_time.strftime('%Y-%m-%d %H:%M:%S')}，唤醒误差 {overshoot * 1000:.3f} 毫秒，开始执行预订")
+        return overshoot
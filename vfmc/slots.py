@@ -0,0 +1,103 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+def to_minutes(clock: str) -> int:
+    """把 "HH:MM" 形式的时间转换为当天的分钟数
+    """
+    hour, _, minute = clock.partition(':')
+    return int(hour) * 60 + int(minute[:2] or 0)
+
+
+class Slot:
+    """一个可预订的场地时段
+
+    只保存下单与选择需要的字段，开始/结束时间预先换算成分钟数。同时支持按接口字段名取值
+    （slot['FieldNo']），可以直接用在原先使用接口返回字典的地方。
+    """
+    __slots__ = ('field_no', 'field_type_no', 'field_name', 'begin_time', 'end_time', 'price', 'begin', 'end', 'key')
+
+    FIELDS = {
+        'FieldNo': 'field_no',
+        'FieldTypeNo': 'field_type_no',
+        'FieldName': 'field_name',
+        'BeginTime': 'begin_time',
+        'EndTime': 'end_time',
+        'FinalPrice': 'price',
+    }
+
+    def __init__(self, field_no: str, field_type_no: str, field_name: str, begin_time: str, end_time: str,
+                 price: str):
+        self.field_no = field_no
+        self.field_type_no = field_type_no
+        self.field_name = field_name
+        self.begin_time = begin_time
+        self.end_time = end_time
+        self.price = price
+        self.begin = to_minutes(begin_time)
+        self.end = to_minutes(end_time)
+        # 与 payload.field_key 对同一场地得到的元组相同，用于查找预编译的下单表单
+        self.key = (field_no, field_type_no, field_name, begin_time, end_time, price)
+
+    @classmethod
+    def from_row(cls, row: Dict) -> 'Slot':
+        return cls(row["FieldNo"], row["FieldTypeNo"], row["FieldName"], row["BeginTime"], row["EndTime"],
+                   row["FinalPrice"])
+
+    def __getitem__(self, key: str):
+        return getattr(self, self.FIELDS[key])
+
+    def get(self, key: str, default=None):
+        attr = self.FIELDS.get(key)
+        return default if attr is None else getattr(self, attr)
+
+    def to_dict(self) -> Dict:
+        return {key: getattr(self, attr) for key, attr in self.FIELDS.items()}
+
+    def __repr__(self) -> str:
+        return f"Slot({self.field_name} {self.begin_time}-{self.end_time})"
+
+
+class SlotIndex:
+    """一次查询得到的可预订时段，以及按开始时间、按场地编号建立的索引
+
+    每次查询只建立一次索引，之后按偏好查找时只需要查字典，与场地数量无关。
+    """
+    __slots__ = ('slots', 'by_begin', 'by_field', 'by_position')
+
+    def __init__(self, slots: Iterable[Slot] = ()):
+        self.slots = list(slots)
+        self.by_begin = {}
+        self.by_field = {}
+        self.by_position = {}
+        for slot in self.slots:
+            self.by_begin.setdefault(slot.begin, []).append(slot)
+            self.by_field.setdefault(slot.field_no, []).append(slot)
+            self.by_position[slot.field_no, slot.begin] = slot
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict]) -> 'SlotIndex':
+        return cls(Slot.from_row(row) for row in rows)
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __iter__(self) -> Iterator[Slot]:
+        return iter(self.slots)
+
+    def __getitem__(self, index: int) -> Slot:
+        return self.slots[index]
+
+    def at(self, preferred_time: str) -> Sequence[Slot]:
+        """开始时间匹配偏好的时段；偏好写成 "HH:MM" 时直接查索引，否则按前缀匹配
+        """
+        if len(preferred_time) == 5 and preferred_time[2] == ':':
+            return self.by_begin.get(to_minutes(preferred_time), ())
+        return [slot for slot in self.slots if slot.begin_time.startswith(preferred_time)]
+
+    def field(self, field_no: str) -> List[Slot]:
+        return self.by_field.get(field_no, [])
+
+    def following(self, slot: Slot) -> Optional[Slot]:
+        """同一场地紧接着 slot 结束时刻开始的可预订时段
+        """
+        return self.by_position.get((slot.field_no, slot.end))
@@ -0,0 +1,67 @@
+from typing import Callable, Optional, Sequence, Tuple
+
+from .decode import VenueState, decode_venue_state
+from .slots import Slot, SlotIndex
+
+
+class SlotDiff:
+    """相邻两次查询之间可预订时段的变化
+
+    freed 为新空出的时段，taken 为不再可预订的时段，free 为本次查询后全部可预订的时段。
+    initial 为 True 表示这是第一次查询，此时所有可预订的时段都算作新空出的。
+    """
+    __slots__ = ('freed', 'taken', 'free', 'initial')
+
+    def __init__(self, freed: Sequence[Slot], taken: Sequence[Slot], free: SlotIndex, initial: bool = False):
+        self.freed = freed
+        self.taken = taken
+        self.free = free
+        self.initial = initial
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.freed) or bool(self.taken)
+
+    def __repr__(self) -> str:
+        return f"SlotDiff(freed={self.freed}, taken={self.taken})"
+
+
+class VenueSnapshot:
+    """单个任务最近一次成功查询的结果，用于与下一次查询比较
+
+    原始响应与上一次完全相同时直接复用上一次的解码结果与索引，不再解码；
+    有变化时按 (场地编号, 开始时间) 比较可预订的时段，得到 SlotDiff。errorcode 不为 0 的响应不会替换快照。
+    """
+
+    def __init__(self, decode: Callable[[bytes], VenueState] = decode_venue_state):
+        self.decode = decode
+        self.body = None
+        self.state = None
+        self.free = SlotIndex()
+        self.polls = 0
+        self.unchanged = 0  # 与上一次完全相同的查询次数
+
+    def update(self, body: bytes) -> Tuple[VenueState, Optional[SlotDiff]]:
+        """解码一次查询的原始响应，返回解码结果与相对上一次的变化（errorcode 不为 0 时变化为 None）
+        """
+        self.polls += 1
+        if self.body is not None and body == self.body:
+            self.unchanged += 1
+            return self.state, SlotDiff((), (), self.free)
+
+        state = self.decode(body)
+        if state.errorcode != 0:
+            return state, None
+
+        previous = self.free.by_position
+        free = SlotIndex(state.free)
+        freed = [slot for position, slot in free.by_position.items() if position not in previous]
+        taken = [slot for position, slot in previous.items() if position not in free.by_position]
+        diff = SlotDiff(freed, taken, free, initial=self.body is None)
+        self.body, self.state, self.free = body, state, free
+        return state, diff
+
+    def clear(self):
+        self.body = None
+        self.state = None
+        self.free = SlotIndex()
@@ -0,0 +1,117 @@
+import json
+import time
+import logging
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from .events import EventLog
+
+logger = logging.getLogger(__name__)
+
+# 一次尝试中会记录的阶段，按发生顺序排列
+PHASES = [
+    'fetch_wait',  # 限流等待结束（设置了限流器时）
+    'fetch_send',  # 发出场馆状态请求
+    'fetch_first_byte',  # 收到响应头
+    'fetch_body',  # 读完响应体
+    'fetch_decode',  # 响应解码完成，得到可预订的时段
+    'filter',  # 可预订时段的索引建立完成
+    'select',  # select_field 完成
+    'order_wait',
+    'order_send',  # 发出下单请求
+    'order_first_byte',
+    'order_body',
+    'order_decode',
+]
+
+Tracer = Callable[[Dict], None]
+
+
+class AttemptTrace:
+    """一次预订尝试的阶段时间戳，基于单调时钟 time.perf_counter
+    """
+    __slots__ = ('job', 'attempt', 'wall_time', 'start', 'marks')
+
+    def __init__(self, job: str, attempt: int):
+        self.job = job
+        self.attempt = attempt
+        self.wall_time = time.time()
+        self.start = time.perf_counter()
+        self.marks = {}
+
+    def mark(self, phase: str):
+        self.marks[phase] = time.perf_counter()
+
+    def to_record(self, outcome: str) -> Dict:
+        """转换成结构化记录：各阶段相对尝试开始的毫秒数，以及相邻阶段之间的耗时
+        """
+        offsets = {phase: (moment - self.start) * 1000 for phase, moment in self.marks.items()}
+        durations = {}
+        previous = 0.0
+        for phase in PHASES:
+            if phase in offsets:
+                durations[phase] = offsets[phase] - previous
+                previous = offsets[phase]
+        return {
+            "job": self.job,
+            "attempt": self.attempt,
+            "wall_time": self.wall_time,
+            "outcome": outcome,
+            "elapsed": (time.perf_counter() - self.start) * 1000,
+            "marks": offsets,
+            "durations": durations,
+        }
+
+
+def log_tracer(record: Dict):
+    """默认的记录处理方式：每次尝试以一行 JSON 写入日志
+    """
+    logger.info(json.dumps(record, ensure_ascii=False))
+
+
+class TraceMixin:
+    """为预订系统提供可选的计时钩子与结构化事件，未设置 tracer 和 events 时所有调用都几乎没有开销
+    """
+    tracer: Optional[Tracer] = None
+    trace: Optional[AttemptTrace] = None
+    events: Optional['EventLog'] = None
+    job_id: str = ''
+    attempt: int = 0
+    attempt_start: float = 0.0
+    wait_ms: Optional[float] = None  # 下一条 fetch 或 order 事件对应请求的限流等待时间
+
+    def begin_attempt(self, attempt: int):
+        self.attempt = attempt
+        self.attempt_start = time.perf_counter()
+        if self.tracer is not None:
+            self.trace = AttemptTrace(self.job_id, attempt)
+
+    def _mark(self, phase: str):
+        if self.trace is not None:
+            self.trace.mark(phase)
+
+    def _event(self, event: str, started: Optional[float] = None, **fields):
+        """写一条结构化事件，started 为该步骤开始时的 perf_counter，用于计算 ms
+        """
+        if self.events is not None:
+            now = time.perf_counter()
+            record = {"event": event, "job": self.job_id, "attempt": self.attempt, "wall_time": time.time(),
+                      "elapsed": (now - self.attempt_start) * 1000 if self.attempt_start else None}
+            if started is not None:
+                record["ms"] = (now - started) * 1000
+            if self.wait_ms is not None and event in ("fetch", "order"):
+                record["wait_ms"], self.wait_ms = self.wait_ms, None
+            record.update(fields)
+            self.events.emit(record)
+
+    def _waited(self, phase: str, wait: float):
+        """记录请求发出前在限流器中等待的时间，写入随后的事件与阶段耗时
+        """
+        self.wait_ms = wait * 1000
+        self._mark(phase)
+
+    def end_attempt(self, outcome: str):
+        self._event("attempt", outcome=outcome)
+        if self.trace is not None:
+            trace, self.trace = self.trace, None
+            self.tracer(trace.to_record(outcome))